@@ -1,3 +1,8 @@
+def sorted_batch(items):
+    # Последнее значение для повторяющегося ключа побеждает
+    return sorted(dict(items).items(), key=lambda item: item[0])
+
+
 class AssociativeContainer:
     def __init__(self):
         pass
@@ -13,3 +18,88 @@ class AssociativeContainer:
 
     def delete(self, key):
         raise NotImplementedError
+
+    def range(self, lo=None, hi=None, reverse=False):
+        raise NotImplementedError
+
+    # Порядковые статистики через обход; деревья с размерами поддеревьев
+    # переопределяют их за O(log n)
+    def rank(self, key):
+        return sum(1 for k, _ in self.range(hi=key) if k != key)
+
+    def select(self, index):
+        if index >= 0:
+            for i, item in enumerate(self.range()):
+                if i == index:
+                    return item
+        raise IndexError("Index out of range.")
+
+    def count_range(self, lo, hi):
+        return sum(1 for _ in self.range(lo, hi))
+
+    # Пакетные операции; деревья переопределяют их, чтобы соседние ключи
+    # пакета использовали общий спуск. Отсутствующие ключи delete_many пропускает
+    def get_many(self, keys):
+        return {key: self.get(key) for key in keys}
+
+    def add_many(self, items):
+        for key, value in sorted_batch(items):
+            self[key] = value
+
+    def delete_many(self, keys):
+        for key in sorted(set(keys)):
+            if key in self:
+                self.delete(key)
+
+    def _merged_items(self, batch):
+        # Слияние текущего содержимого с отсортированным пакетом,
+        # значения из пакета перекрывают существующие
+        merged = []
+        i = 0
+        for key, value in self.range():
+            while i < len(batch) and batch[i][0] < key:
+                merged.append(batch[i])
+                i += 1
+            if i < len(batch) and batch[i][0] == key:
+                merged.append(batch[i])
+                i += 1
+            else:
+                merged.append((key, value))
+        merged.extend(batch[i:])
+        return merged
+
+    # Словарный интерфейс, чтобы DataCollection и команды истории
+    # могли работать с деревом так же, как с dict
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.update(key, value)
+        else:
+            self.add(key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.delete(key)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self):
+        for key, _ in self.range():
+            yield key
+
+    def values(self):
+        for _, value in self.range():
+            yield value
+
+    def items(self):
+        return self.range()
@@ -1,4 +1,6 @@
-from associative_container import AssociativeContainer
+from bisect import bisect_left
+
+from associative_container import AssociativeContainer, sorted_batch
 
 # avl_tree.py
 
@@ -9,6 +11,7 @@ class AVLTreeNode:
         self.left = None
         self.right = None
         self.height = 1  # Начальная высота узла - 1
+        self.size = 1  # Число узлов в поддереве
 
 class AVLTree(AssociativeContainer):
     def __init__(self):
@@ -38,6 +41,7 @@ class AVLTree(AssociativeContainer):
             return node
 
         node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
+        node.size = 1 + self._get_size(node.left) + self._get_size(node.right)
 
         balance = self._get_balance(node)
 
@@ -70,6 +74,122 @@ class AVLTree(AssociativeContainer):
         else:
             return node.value
 
+    def range(self, lo=None, hi=None, reverse=False):
+        # Один спуск до границы, дальше обычный in-order обход по стеку
+        stack = []
+        self._descend_to_bound(self.root, stack, lo, hi, reverse)
+        while stack:
+            node = stack.pop()
+            if reverse:
+                if lo is not None and node.key < lo:
+                    return
+                next_node = node.left
+            else:
+                if hi is not None and node.key > hi:
+                    return
+                next_node = node.right
+            yield node.key, node.value
+            self._descend_to_bound(next_node, stack, lo, hi, reverse)
+
+    def _descend_to_bound(self, node, stack, lo, hi, reverse):
+        while node is not None:
+            if reverse:
+                if hi is not None and node.key > hi:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            else:
+                if lo is not None and node.key < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+
+    def rank(self, key):
+        return self._count_less(key, False)
+
+    def count_range(self, lo, hi):
+        if lo is not None and hi is not None and lo > hi:
+            return 0
+        upper = self._get_size(self.root) if hi is None else self._count_less(hi, True)
+        lower = 0 if lo is None else self._count_less(lo, False)
+        return upper - lower
+
+    def _count_less(self, key, inclusive):
+        # Число ключей < key (или <= key при inclusive) за один спуск
+        count = 0
+        node = self.root
+        while node is not None:
+            if key < node.key or (key == node.key and not inclusive):
+                node = node.left
+            else:
+                count += self._get_size(node.left) + 1
+                node = node.right
+        return count
+
+    def select(self, index):
+        if index < 0 or index >= self._get_size(self.root):
+            raise IndexError("Index out of range.")
+        node = self.root
+        while True:
+            left_size = self._get_size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.key, node.value
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def get_many(self, keys):
+        batch = sorted(set(keys))
+        found = {}
+        self._get_many(self.root, batch, 0, len(batch), found)
+        return {key: found.get(key) for key in keys}
+
+    def _get_many(self, node, batch, lo, hi, found):
+        # Пакет делится ключом узла, поэтому каждый узел посещается
+        # не больше одного раза за весь пакет
+        if node is None or lo >= hi:
+            return
+        mid = bisect_left(batch, node.key, lo, hi)
+        self._get_many(node.left, batch, lo, mid, found)
+        if mid < hi and batch[mid] == node.key:
+            found[node.key] = node.value
+            mid += 1
+        self._get_many(node.right, batch, mid, hi, found)
+
+    def add_many(self, items):
+        batch = sorted_batch(items)
+        # Крупный пакет дешевле слить с деревом и построить его заново за O(n + k)
+        if len(batch) * 4 >= self._get_size(self.root):
+            merged = self._merged_items(batch)
+            self.root = self._build(merged, 0, len(merged))
+        else:
+            for key, value in batch:
+                self.root = self._add(self.root, key, value)
+
+    def delete_many(self, keys):
+        batch = set(keys)
+        if len(batch) * 4 >= self._get_size(self.root):
+            remaining = [item for item in self.range() if item[0] not in batch]
+            self.root = self._build(remaining, 0, len(remaining))
+        else:
+            for key in sorted(batch):
+                self.root = self._delete(self.root, key)
+
+    def _build(self, items, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = AVLTreeNode(*items[mid])
+        node.left = self._build(items, lo, mid)
+        node.right = self._build(items, mid + 1, hi)
+        node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
+        node.size = hi - lo
+        return node
+
     def update(self, key, value):
         self.root = self._update(self.root, key, value)
 
@@ -111,6 +231,7 @@ class AVLTree(AssociativeContainer):
 
         # Обновляем высоту узла
         node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
+        node.size = 1 + self._get_size(node.left) + self._get_size(node.right)
 
         # Проверяем баланс и перебалансируем при необходимости
         balance = self._get_balance(node)
@@ -136,6 +257,11 @@ class AVLTree(AssociativeContainer):
             return 0
         return node.height
 
+    def _get_size(self, node):
+        if node is None:
+            return 0
+        return node.size
+
     def _get_balance(self, node):
         if node is None:
             return 0
@@ -149,7 +275,9 @@ class AVLTree(AssociativeContainer):
         z.left = T3
 
         z.height = 1 + max(self._get_height(z.left), self._get_height(z.right))
+        z.size = 1 + self._get_size(z.left) + self._get_size(z.right)
         y.height = 1 + max(self._get_height(y.left), self._get_height(y.right))
+        y.size = 1 + self._get_size(y.left) + self._get_size(y.right)
 
         return y
 
@@ -161,7 +289,9 @@ class AVLTree(AssociativeContainer):
         z.right = T2
 
         z.height = 1 + max(self._get_height(z.left), self._get_height(z.right))
+        z.size = 1 + self._get_size(z.left) + self._get_size(z.right)
         y.height = 1 + max(self._get_height(y.left), self._get_height(y.right))
+        y.size = 1 + self._get_size(y.left) + self._get_size(y.right)
 
         return y
 
@@ -0,0 +1,139 @@
+import math
+import zlib
+
+
+# bloom_filter.py
+# Фильтр Блума перед коллекцией или индексом: если хотя бы один из k битов
+# ключа не установлен, ключа точно нет, и спуск по дереву не нужен.
+# Хеш (crc32) стабилен между процессами, поэтому фильтр сохраняется в снимке
+# вместе с коллекцией. Удалять из фильтра нельзя, поэтому после большого числа
+# удалений или при переполнении он перестраивается по текущим ключам.
+
+BLOOM_FP_RATE = 0.01
+MIN_CAPACITY = 1024
+GROWTH = 2  # Запас ёмкости при перестройке относительно текущего числа ключей
+STALE_RATIO = 0.25  # Доля удалённых ключей, после которой фильтр перестраивается
+GOLDEN = 0x9E3779B1
+
+
+def key_bytes(key):
+    # Контейнеры ищут ключ по ==, поэтому равные числа (1, 1.0, True) должны
+    # давать одни и те же байты. Для прочих типов равенство не сводится к repr,
+    # и фильтр их не отсекает (None)
+    if isinstance(key, str):
+        return key.encode("utf-8", "surrogatepass")
+    if isinstance(key, float) and key.is_integer():
+        key = int(key)
+    if isinstance(key, int):
+        return str(int(key)).encode()
+    if isinstance(key, float):
+        return repr(key).encode()
+    return None
+
+
+class BloomFilter:
+    def __init__(self, capacity, fp_rate=BLOOM_FP_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0  # Добавлено ключей с последней перестройки
+        self.removed = 0  # Удалено ключей с последней перестройки
+        # Статистика для метрики: отсечённые промахи и ложные срабатывания
+        self.lookups = 0
+        self.rejected = 0
+        self.false_positives = 0
+
+    def _hash(self, key):
+        # Двойное хеширование: позиция i = h1 + i * h2. Второй хеш получаем
+        # умножением первого на золотое сечение, чтобы не считать crc дважды
+        data = key_bytes(key)
+        if data is None:
+            return None
+        h1 = zlib.crc32(data)
+        return h1, (h1 * GOLDEN >> 15) & 0xFFFFFFFF | 1
+
+    def add(self, key):
+        # Ключ, все биты которого уже стояли (например, при обновлении),
+        # не расходует ёмкость фильтра
+        hashed = self._hash(key)
+        if hashed is None:
+            return
+        h1, h2 = hashed
+        bits, size = self.bits, self.size
+        new = False
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bit = 1 << (position & 7)
+            if not bits[position >> 3] & bit:
+                bits[position >> 3] |= bit
+                new = True
+        if new:
+            self.count += 1
+
+    def __contains__(self, key):
+        # Проверка обрывается на первом пустом бите, так что промах
+        # обычно стоит одного-двух обращений к массиву
+        hashed = self._hash(key)
+        if hashed is None:
+            return True
+        h1, h2 = hashed
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def might_contain(self, key):
+        self.lookups += 1
+        if key in self:
+            return True
+        self.rejected += 1
+        return False
+
+    def needs_rebuild(self):
+        return self.count > self.capacity or self.removed > self.count * STALE_RATIO
+
+    def rebuild(self, keys):
+        # Новый фильтр по текущим ключам; счётчики метрики переносятся
+        return build_filter(keys, self.fp_rate, self)
+
+    def estimated_fp_rate(self):
+        # Вероятность, что все k битов случайного ключа уже установлены
+        filled = int.from_bytes(self.bits, "little").bit_count() / self.size
+        return filled ** self.hashes
+
+    def observed_fp_rate(self):
+        # Доля промахов, которые фильтр пропустил к дереву
+        misses = self.rejected + self.false_positives
+        return self.false_positives / misses if misses else 0.0
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "keys": self.count,
+            "removed": self.removed,
+            "lookups": self.lookups,
+            "rejected": self.rejected,
+            "false_positives": self.false_positives,
+            "estimated_fp_rate": self.estimated_fp_rate(),
+            "observed_fp_rate": self.observed_fp_rate(),
+        }
+
+
+def build_filter(keys, fp_rate=BLOOM_FP_RATE, previous=None, expected_keys=None):
+    keys = list(keys)
+    capacity = max(len(keys) * GROWTH, expected_keys or 0, MIN_CAPACITY)
+    bloom = BloomFilter(capacity, fp_rate)
+    for key in keys:
+        bloom.add(key)
+    if previous is not None:
+        bloom.lookups = previous.lookups
+        bloom.rejected = previous.rejected
+        bloom.false_positives = previous.false_positives
+    return bloom
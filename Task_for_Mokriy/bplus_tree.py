@@ -0,0 +1,242 @@
+from bisect import bisect_left, bisect_right
+
+from associative_container import AssociativeContainer
+from btree import level_node_count, split_sizes
+
+
+# bplus_tree.py
+
+class BPlusTreeNode:
+    def __init__(self, leaf=False):
+        self.leaf = leaf
+        self.keys = []
+        self.values = []  # Только в листьях
+        self.children = []  # Только во внутренних узлах
+        self.prev = None  # Соседние листья
+        self.next = None
+
+    def __str__(self):
+        return f"Keys: {self.keys}, Values: {self.values}, Leaf: {self.leaf}"
+
+
+class BPlusTree(AssociativeContainer):
+    def __init__(self, degree=32):
+        super().__init__()
+        self.t = degree
+        self.root = BPlusTreeNode(True)
+
+    @classmethod
+    def bulk_load(cls, sorted_items, degree=32, fill_factor=1.0):
+        tree = cls(degree)
+        t = degree
+        keys = []
+        values = []
+        for key, value in sorted_items:
+            if keys and not keys[-1] < key:
+                raise ValueError("Keys must be sorted and unique.")
+            keys.append(key)
+            values.append(value)
+        if not keys:
+            return tree
+
+        capacity = max(t - 1, min(2 * t - 1, int((2 * t - 1) * fill_factor)))
+
+        level = []
+        pos = 0
+        for size in split_sizes(len(keys), level_node_count(len(keys), capacity, t - 1)):
+            leaf = BPlusTreeNode(True)
+            leaf.keys = keys[pos:pos + size]
+            leaf.values = values[pos:pos + size]
+            if level:
+                level[-1].next = leaf
+                leaf.prev = level[-1]
+            level.append(leaf)
+            pos += size
+        # Минимальный ключ каждого поддерева служит разделителем в родителе
+        mins = [leaf.keys[0] for leaf in level]
+
+        while len(level) > 1:
+            parents = []
+            parent_mins = []
+            pos = 0
+            for size in split_sizes(len(level), level_node_count(len(level), capacity + 1, t)):
+                node = BPlusTreeNode(False)
+                node.children = level[pos:pos + size]
+                node.keys = mins[pos + 1:pos + size]
+                parents.append(node)
+                parent_mins.append(mins[pos])
+                pos += size
+            level, mins = parents, parent_mins
+
+        tree.root = level[0]
+        return tree
+
+    def _find_leaf(self, key):
+        node = self.root
+        while not node.leaf:
+            node = node.children[bisect_right(node.keys, key)]
+        return node
+
+    def add(self, key, value):
+        split = self._add(self.root, key, value)
+        if split:
+            separator, right = split
+            new_root = BPlusTreeNode(False)
+            new_root.keys = [separator]
+            new_root.children = [self.root, right]
+            self.root = new_root
+
+    def _add(self, node, key, value):
+        if node.leaf:
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                node.values[i] = value
+                return None
+            node.keys.insert(i, key)
+            node.values.insert(i, value)
+        else:
+            i = bisect_right(node.keys, key)
+            split = self._add(node.children[i], key, value)
+            if split is None:
+                return None
+            separator, right = split
+            node.keys.insert(i, separator)
+            node.children.insert(i + 1, right)
+
+        if len(node.keys) > 2 * self.t - 1:
+            return self._split(node)
+        return None
+
+    def _split(self, node):
+        mid = len(node.keys) // 2
+        right = BPlusTreeNode(node.leaf)
+        if node.leaf:
+            right.keys = node.keys[mid:]
+            right.values = node.values[mid:]
+            node.keys = node.keys[:mid]
+            node.values = node.values[:mid]
+            right.next = node.next
+            if right.next:
+                right.next.prev = right
+            right.prev = node
+            node.next = right
+            return right.keys[0], right
+        separator = node.keys[mid]
+        right.keys = node.keys[mid + 1:]
+        right.children = node.children[mid + 1:]
+        node.keys = node.keys[:mid]
+        node.children = node.children[:mid + 1]
+        return separator, right
+
+    def get(self, key):
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return leaf.values[i]
+        return None
+
+    def update(self, key, value):
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            leaf.values[i] = value
+        else:
+            raise KeyError(f"Key '{key}' not found.")
+
+    def delete(self, key):
+        if not self._delete(self.root, key):
+            raise KeyError(f"Key '{key}' not found.")
+        if not self.root.leaf and len(self.root.keys) == 0:
+            self.root = self.root.children[0]
+
+    def _delete(self, node, key):
+        if node.leaf:
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                del node.keys[i]
+                del node.values[i]
+                return True
+            return False
+
+        i = bisect_right(node.keys, key)
+        if not self._delete(node.children[i], key):
+            return False
+        if len(node.children[i].keys) < self.t - 1:
+            self._rebalance(node, i)
+        return True
+
+    def _rebalance(self, node, i):
+        child = node.children[i]
+        t = self.t
+        if i > 0 and len(node.children[i - 1].keys) > t - 1:
+            sibling = node.children[i - 1]
+            if child.leaf:
+                child.keys.insert(0, sibling.keys.pop())
+                child.values.insert(0, sibling.values.pop())
+                node.keys[i - 1] = child.keys[0]
+            else:
+                child.keys.insert(0, node.keys[i - 1])
+                child.children.insert(0, sibling.children.pop())
+                node.keys[i - 1] = sibling.keys.pop()
+        elif i < len(node.keys) and len(node.children[i + 1].keys) > t - 1:
+            sibling = node.children[i + 1]
+            if child.leaf:
+                child.keys.append(sibling.keys.pop(0))
+                child.values.append(sibling.values.pop(0))
+                node.keys[i] = sibling.keys[0]
+            else:
+                child.keys.append(node.keys[i])
+                child.children.append(sibling.children.pop(0))
+                node.keys[i] = sibling.keys.pop(0)
+        elif i > 0:
+            self._merge(node, i - 1)
+        else:
+            self._merge(node, i)
+
+    def _merge(self, node, index):
+        left = node.children[index]
+        right = node.children[index + 1]
+        if left.leaf:
+            left.keys.extend(right.keys)
+            left.values.extend(right.values)
+            left.next = right.next
+            if left.next:
+                left.next.prev = left
+        else:
+            left.keys.append(node.keys[index])
+            left.keys.extend(right.keys)
+            left.children.extend(right.children)
+        del node.keys[index]
+        del node.children[index + 1]
+
+    def range(self, lo=None, hi=None, reverse=False):
+        # Спуск до граничного листа, дальше идём по цепочке листьев
+        if reverse:
+            leaf = self._find_leaf(hi) if hi is not None else self._edge_leaf(-1)
+            i = (bisect_right(leaf.keys, hi) if hi is not None else len(leaf.keys)) - 1
+            while leaf:
+                while i >= 0:
+                    if lo is not None and leaf.keys[i] < lo:
+                        return
+                    yield leaf.keys[i], leaf.values[i]
+                    i -= 1
+                leaf = leaf.prev
+                if leaf:
+                    i = len(leaf.keys) - 1
+        else:
+            leaf = self._find_leaf(lo) if lo is not None else self._edge_leaf(0)
+            i = bisect_left(leaf.keys, lo) if lo is not None else 0
+            while leaf:
+                while i < len(leaf.keys):
+                    if hi is not None and leaf.keys[i] > hi:
+                        return
+                    yield leaf.keys[i], leaf.values[i]
+                    i += 1
+                leaf = leaf.next
+                i = 0
+
+    def _edge_leaf(self, side):
+        node = self.root
+        while not node.leaf:
+            node = node.children[side]
+        return node
@@ -1,5 +1,20 @@
-from associative_container import AssociativeContainer
+import operator
+from bisect import bisect_left, bisect_right
+from itertools import islice
 
+from associative_container import AssociativeContainer, sorted_batch
+
+
+def level_node_count(total, per_node, minimum):
+    # Узлов должно хватить, чтобы не превысить per_node,
+    # но не столько, чтобы какой-то узел оказался меньше minimum
+    count = -(-total // per_node)
+    return max(1, min(count, total // minimum))
+
+
+def split_sizes(total, count):
+    base, extra = divmod(total, count)
+    return [base + 1 if i < extra else base for i in range(count)]
 
 
 class BTreeNode:
@@ -15,11 +30,65 @@ class BTreeNode:
 
 
 class BTree(AssociativeContainer):
-    def __init__(self, degree):
+    def __init__(self, degree=3):
         super().__init__()
         self.root = BTreeNode(degree, True)
         self.t = degree
 
+    @classmethod
+    def bulk_load(cls, sorted_items, degree=3, fill_factor=1.0):
+        # Строим дерево снизу вверх за один проход: сначала листья,
+        # затем уровни внутренних узлов из разделителей между ними
+        tree = cls(degree)
+        t = degree
+        items = list(sorted_items)
+        keys = [key for key, _ in items]
+        values = [value for _, value in items]
+        if not all(map(operator.lt, keys, islice(keys, 1, None))):
+            raise ValueError("Keys must be sorted and unique.")
+        if not keys:
+            return tree
+
+        capacity = max(t - 1, min(2 * t - 1, int((2 * t - 1) * fill_factor)))
+
+        n = len(keys)
+        count = level_node_count(n + 1, capacity + 1, t)
+        level = []
+        sep_keys = []
+        sep_values = []
+        pos = 0
+        for size in split_sizes(n - count + 1, count):
+            node = BTreeNode(t, True)
+            node.keys = keys[pos:pos + size]
+            node.values = values[pos:pos + size]
+            level.append(node)
+            pos += size
+            if pos < n:
+                sep_keys.append(keys[pos])
+                sep_values.append(values[pos])
+                pos += 1
+
+        while len(level) > 1:
+            count = level_node_count(len(level), capacity + 1, t)
+            parents = []
+            up_keys = []
+            up_values = []
+            pos = 0
+            for size in split_sizes(len(level), count):
+                node = BTreeNode(t, False)
+                node.children = level[pos:pos + size]
+                node.keys = sep_keys[pos:pos + size - 1]
+                node.values = sep_values[pos:pos + size - 1]
+                parents.append(node)
+                pos += size
+                if pos < len(level):
+                    up_keys.append(sep_keys[pos - 1])
+                    up_values.append(sep_values[pos - 1])
+            level, sep_keys, sep_values = parents, up_keys, up_values
+
+        tree.root = level[0]
+        return tree
+
     def add(self, key, value):
         root = self.root
         if len(root.keys) == (2 * self.t) - 1:
@@ -30,20 +99,11 @@ class BTree(AssociativeContainer):
         self._insert_non_full(self.root, key, value)
 
     def _insert_non_full(self, node, key, value):
-        i = len(node.keys) - 1
+        i = bisect_right(node.keys, key)
         if node.leaf:
-            node.keys.append(None)
-            node.values.append(None)
-            while i >= 0 and key < node.keys[i]:
-                node.keys[i + 1] = node.keys[i]
-                node.values[i + 1] = node.values[i]
-                i -= 1
-            node.keys[i + 1] = key
-            node.values[i + 1] = value
+            node.keys.insert(i, key)
+            node.values.insert(i, value)
         else:
-            while i >= 0 and key < node.keys[i]:
-                i -= 1
-            i += 1
             if len(node.children[i].keys) == (2 * self.t) - 1:
                 self.split_child(node, i)
                 if key > node.keys[i]:
@@ -71,9 +131,7 @@ class BTree(AssociativeContainer):
         return self._search(self.root, key)
 
     def _search(self, node, key):
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
+        i = bisect_left(node.keys, key)
         if i < len(node.keys) and key == node.keys[i]:
             return node.values[i]
         elif node.leaf:
@@ -81,12 +139,85 @@ class BTree(AssociativeContainer):
         else:
             return self._search(node.children[i], key)
 
+    def range(self, lo=None, hi=None, reverse=False):
+        if reverse:
+            return self._range_reverse(self.root, lo, hi)
+        return self._range(self.root, lo, hi)
+
+    def _range(self, node, lo, hi):
+        # Граница lo нужна только на левом краю диапазона,
+        # остальные поддеревья обходятся целиком
+        start = 0 if lo is None else bisect_left(node.keys, lo)
+        for i in range(start, len(node.keys) + 1):
+            if not node.leaf:
+                yield from self._range(node.children[i], lo if i == start else None, hi)
+            if i == len(node.keys):
+                return
+            if hi is not None and node.keys[i] > hi:
+                return
+            yield node.keys[i], node.values[i]
+
+    def _range_reverse(self, node, lo, hi):
+        end = len(node.keys) if hi is None else bisect_right(node.keys, hi)
+        for i in range(end, -1, -1):
+            if not node.leaf:
+                yield from self._range_reverse(node.children[i], lo, hi if i == end else None)
+            if i == 0:
+                return
+            if lo is not None and node.keys[i - 1] < lo:
+                return
+            yield node.keys[i - 1], node.values[i - 1]
+
+    def get_many(self, keys):
+        batch = sorted(set(keys))
+        found = {}
+        self._get_many(self.root, batch, 0, len(batch), found)
+        return {key: found.get(key) for key in keys}
+
+    def _get_many(self, node, batch, lo, hi, found):
+        # Соседние ключи пакета, попадающие в одного ребёнка, спускаются вместе
+        pos = lo
+        while pos < hi:
+            i = bisect_left(node.keys, batch[pos])
+            if i < len(node.keys) and node.keys[i] == batch[pos]:
+                found[batch[pos]] = node.values[i]
+                pos += 1
+                continue
+            end = hi if i == len(node.keys) else bisect_left(batch, node.keys[i], pos, hi)
+            if not node.leaf:
+                self._get_many(node.children[i], batch, pos, end, found)
+            pos = end
+
+    def add_many(self, items):
+        batch = sorted_batch(items)
+        # Крупный пакет, как в AVL и красно-чёрном, сливается с деревом,
+        # и оно строится заново снизу вверх за O(n + k)
+        if len(batch) * 4 >= self._estimated_size():
+            self.root = BTree.bulk_load(self._merged_items(batch), self.t).root
+        else:
+            for key, value in batch:
+                if not self.update(key, value):
+                    self.add(key, value)
+
+    def _estimated_size(self):
+        # Размеры поддеревьев не хранятся, поэтому число ключей оценивается
+        # по левому пути: произведение ветвлений узлов за O(высоты)
+        size = 1
+        node = self.root
+        while True:
+            size *= len(node.keys) + 1
+            if node.leaf:
+                return size - 1
+            node = node.children[0]
+
+    def delete_many(self, keys):
+        for key in sorted(set(keys)):
+            self.delete(key)
+
     def update(self, key, value):
         node = self.root
         while node:
-            i = 0
-            while i < len(node.keys) and key > node.keys[i]:
-                i += 1
+            i = bisect_left(node.keys, key)
             if i < len(node.keys) and key == node.keys[i]:
                 node.values[i] = value
                 return True
@@ -106,9 +237,7 @@ class BTree(AssociativeContainer):
 
     def _delete(self, node, key):
         t = self.t
-        i = 0
-        while i < len(node.keys) and key > node.keys[i]:
-            i += 1
+        i = bisect_left(node.keys, key)
 
         if i < len(node.keys) and key == node.keys[i]:
             if node.leaf:
@@ -139,6 +268,7 @@ class BTree(AssociativeContainer):
                         self._merge(node, i)
                     else:
                         self._merge(node, i - 1)
+                        i -= 1
             self._delete(node.children[i], key)
 
     def _get_predecessor(self, node, index):
@@ -1,10 +1,13 @@
 import os
+from datetime import datetime
 from state_management import StateManager
+from query_planner import parse_predicates
 
 class CommandProcessor:
     def __init__(self, data_storage_system):
         self.data_storage_system = data_storage_system
         self.state_manager = StateManager(data_storage_system)
+        self.transaction = None  # Открытая командой BEGIN транзакция
 
         self.command_mapping = {
             "ADD_POOL": self.add_pool,
@@ -13,14 +16,40 @@ class CommandProcessor:
             "REMOVE_SCHEMA": self.remove_schema,
             "ADD_COLLECTION": self.add_collection,
             "REMOVE_COLLECTION": self.remove_collection,
+            "IMPORT_COLLECTION": self.import_collection,
             "ADD_RECORD_AVL": self.add_record_avl,
             "ADD_RECORD_RED_BLACK": self.add_record_red_black,
             "GET_RECORD_AVL": self.get_record_avl,
             "GET_RECORD_RED_BLACK": self.get_record_red_black,
             "GET_RECORD_BTREE": self.get_record_btree,
             "ADD_RECORD_BTREE": self.add_record_btree,
+            "RANK": self.rank,
+            "SELECT": self.select,
+            "COUNT_RANGE": self.count_range,
+            "MULTI_GET": self.multi_get,
+            "MULTI_ADD": self.multi_add,
+            "MULTI_DELETE": self.multi_delete,
+            "CREATE_INDEX": self.create_index,
+            "SEARCH": self.search,
+            "ENABLE_BLOOM": self.enable_bloom,
+            "QUERY": self.query,
+            "EXPLAIN": self.explain,
+            "ANALYZE": self.analyze,
+            "BLOOM_STATS": self.bloom_stats,
+            "SET_RETENTION": self.set_retention,
+            "ROLLBACK": self.rollback,
+            "BEGIN": self.begin,
+            "COMMIT": self.commit,
+            "ABORT": self.abort,
+            "ADD_RECORD": self.add_record,
+            "UPDATE_RECORD": self.update_record,
+            "DELETE_RECORD": self.delete_record,
             "SAVE_STATE": self.save_state,
-            "LOAD_STATE": self.load_state
+            "LOAD_STATE": self.load_state,
+            "BGSAVE": self.bgsave,
+            "SAVE_INCREMENTAL": self.save_incremental,
+            "MERGE_SNAPSHOT": self.merge_snapshot,
+            "LASTSAVE": self.lastsave
         }
 
     def process_command(self, command):
@@ -53,7 +82,9 @@ class CommandProcessor:
     def add_schema(self, pool_name, schema_name):
         pool = self.data_storage_system.get_pool(pool_name)
         if pool:
-            pool.add_schema(schema_name)
+            if pool.get_schema(schema_name) is not None:
+                raise KeyError(f"Schema '{schema_name}' already exists in the data pool.")
+            self.data_storage_system.add_schema(pool_name, schema_name)
             print(f"Schema {schema_name} added to pool {pool_name}.")
         else:
             print(f"Pool {pool_name} does not exist.")
@@ -61,7 +92,9 @@ class CommandProcessor:
     def remove_schema(self, pool_name, schema_name):
         pool = self.data_storage_system.get_pool(pool_name)
         if pool:
-            pool.remove_schema(schema_name)
+            if pool.get_schema(schema_name) is None:
+                raise KeyError(f"Schema '{schema_name}' does not exist in the data pool.")
+            self.data_storage_system.remove_schema(pool_name, schema_name)
             print(f"Schema {schema_name} removed from pool {pool_name}.")
         else:
             print(f"Pool {pool_name} does not exist.")
@@ -71,19 +104,42 @@ class CommandProcessor:
         if pool:
             schema = pool.get_schema(schema_name)
             if schema:
-                schema.add_collection(collection_name, collection_type)
+                self.data_storage_system.add_collection(pool_name, schema_name, collection_name, collection_type)
                 print(f"Collection {collection_name} added to schema {schema_name} in pool {pool_name}.")
             else:
                 print(f"Schema {schema_name} does not exist in pool {pool_name}.")
         else:
             print(f"Pool {pool_name} does not exist.")
 
+    def import_collection(self, pool_name, schema_name, collection_name, collection_type, filepath):
+        if not os.path.exists(filepath):
+            print(f"File {filepath} does not exist.")
+            return
+        pool = self.data_storage_system.get_pool(pool_name)
+        if pool:
+            schema = pool.get_schema(schema_name)
+            if schema:
+                items = []
+                with open(filepath, 'r') as file:
+                    for line in file:
+                        parts = line.strip().split(maxsplit=1)
+                        if parts:
+                            items.append((parts[0], parts[1] if len(parts) > 1 else ""))
+                self.data_storage_system.add_collection(pool_name, schema_name, collection_name, collection_type, items)
+                print(f"Collection {collection_name} imported into schema {schema_name} in pool {pool_name} ({len(items)} records).")
+            else:
+                print(f"Schema {schema_name} does not exist in pool {pool_name}.")
+        else:
+            print(f"Pool {pool_name} does not exist.")
+
     def remove_collection(self, pool_name, schema_name, collection_name):
         pool = self.data_storage_system.get_pool(pool_name)
         if pool:
             schema = pool.get_schema(schema_name)
             if schema:
-                schema.remove_collection(collection_name)
+                if schema.get_collection(collection_name) is None:
+                    raise KeyError(f"Collection '{collection_name}' does not exist in schema '{schema_name}'.")
+                self.data_storage_system.remove_collection(pool_name, schema_name, collection_name)
                 print(f"Collection {collection_name} removed from schema {schema_name} in pool {pool_name}.")
             else:
                 print(f"Schema {schema_name} does not exist in pool {pool_name}.")
@@ -189,10 +245,267 @@ class CommandProcessor:
         else:
             print(f"Pool {pool_name} does not exist.")
 
+    def _get_collection(self, pool_name, schema_name, collection_name):
+        pool = self.data_storage_system.get_pool(pool_name)
+        if not pool:
+            print(f"Pool {pool_name} does not exist.")
+            return None
+        schema = pool.get_schema(schema_name)
+        if not schema:
+            print(f"Schema {schema_name} does not exist in pool {pool_name}.")
+            return None
+        collection = schema.get_collection(collection_name)
+        if collection is None:
+            print(f"Collection {collection_name} does not exist in schema {schema_name}.")
+        return collection
+
+    def rank(self, pool_name, schema_name, collection_name, key):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            print(f"Rank of {key} in collection {collection_name}: {collection.rank(key)}")
+
+    def select(self, pool_name, schema_name, collection_name, index):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            key, value = collection.select(int(index))
+            print(f"Record #{index} in collection {collection_name}: {key} {value}")
+
+    def count_range(self, pool_name, schema_name, collection_name, min_key, max_key):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            count = collection.count_range(min_key, max_key)
+            print(f"Records between {min_key} and {max_key} in collection {collection_name}: {count}")
+
+    def multi_get(self, pool_name, schema_name, collection_name, *keys):
+        records = self.get_records(pool_name, schema_name, collection_name, keys)
+        if records is not None:
+            for key, value in records.items():
+                print(f"Record {key} from collection {collection_name}: {value}")
+
+    def multi_add(self, pool_name, schema_name, collection_name, *parts):
+        if len(parts) % 2:
+            print("MULTI_ADD expects key/value pairs.")
+            return
+        self.add_records(pool_name, schema_name, collection_name, list(zip(parts[0::2], parts[1::2])))
+
+    def multi_delete(self, pool_name, schema_name, collection_name, *keys):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.delete_many(keys)
+            print(f"{len(keys)} records deleted from collection {collection_name} in pool {pool_name}.")
+
+    def create_index(self, pool_name, schema_name, collection_name, index_name, kind="hash"):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.create_index(index_name, kind)
+            print(f"Index {index_name} ({kind}) created on collection {collection_name} in pool {pool_name}.")
+
+    def search(self, pool_name, schema_name, collection_name, index_name, *query_parts):
+        # SEARCH pool schema collection index слово префикс* "фраза из слов"
+        records = self.search_records(pool_name, schema_name, collection_name, index_name, " ".join(query_parts))
+        if records is not None:
+            print(f"{len(records)} records found in collection {collection_name}.")
+            for key, value in records.items():
+                print(f"Record {key} from collection {collection_name}: {value}")
+
+    def query(self, pool_name, schema_name, collection_name, *condition):
+        # QUERY pool schema collection key between a b and status = open and body match "текст"
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            count = 0
+            for key, value in collection.query(parse_predicates(condition)):
+                print(f"Record {key} from collection {collection_name}: {value}")
+                count += 1
+            print(f"{count} records found in collection {collection_name}.")
+
+    def explain(self, pool_name, schema_name, collection_name, *condition):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            plan, plans = collection.explain(parse_predicates(condition))
+            print(f"Plan: {plan.describe()}")
+            for other in plans:
+                if other is not plan:
+                    print(f"  considered: {other.describe()}")
+
+    def analyze(self, pool_name, schema_name, collection_name):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.analyze()
+            print(f"Statistics collected for collection {collection_name} in pool {pool_name}.")
+
+    def enable_bloom(self, pool_name, schema_name, collection_name, expected_keys=None, fp_rate=None, index_name=None):
+        # ENABLE_BLOOM pool schema collection [ожидаемое число ключей] [доля ложных срабатываний] [индекс]
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is None:
+            return
+        options = {}
+        if expected_keys is not None:
+            options["expected_keys"] = int(expected_keys)
+        if fp_rate is not None:
+            options["fp_rate"] = float(fp_rate)
+        if index_name is None:
+            collection.enable_bloom_filter(**options)
+            print(f"Bloom filter enabled on collection {collection_name} in pool {pool_name}.")
+        else:
+            collection.enable_index_bloom_filter(index_name, **options)
+            print(f"Bloom filter enabled on index {index_name} of collection {collection_name} in pool {pool_name}.")
+
+    def bloom_stats(self, pool_name, schema_name, collection_name):
+        stats = self.get_bloom_stats(pool_name, schema_name, collection_name)
+        if stats is None:
+            return
+        filters = list(stats["indexes"].items())
+        if stats["collection"] is not None:
+            filters.insert(0, (collection_name, stats["collection"]))
+        if not filters:
+            print(f"No Bloom filters on collection {collection_name}.")
+        for name, info in filters:
+            print(f"Bloom filter {name}: {info['keys']} keys, {info['bits']} bits, {info['hashes']} hashes, "
+                  f"{info['rejected']} of {info['lookups']} lookups rejected, "
+                  f"false positive rate {info['observed_fp_rate']:.4f} observed, {info['estimated_fp_rate']:.4f} estimated")
+
+    def set_retention(self, pool_name, schema_name, collection_name, *limits):
+        # SET_RETENTION pool schema collection [entries N] [age SECONDS] [bytes N]
+        if len(limits) % 2:
+            print("SET_RETENTION expects limit/value pairs.")
+            return
+        options = {}
+        for kind, value in zip(limits[0::2], limits[1::2]):
+            if kind == "entries":
+                options["max_entries"] = int(value)
+            elif kind == "age":
+                options["max_age"] = float(value)
+            elif kind == "bytes":
+                options["max_bytes"] = int(value)
+            else:
+                raise ValueError(f"Unknown retention limit '{kind}'.")
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.set_retention(**options)
+            print(f"History retention for collection {collection_name} set to {options or 'unlimited'}.")
+
+    def rollback(self, timestamp, pool_name, schema_name=None, collection_name=None):
+        # ROLLBACK 2024-05-01T12:30:00 pool [schema [collection]]
+        undone = self.data_storage_system.rollback(datetime.fromisoformat(timestamp), pool_name,
+                                                   schema_name, collection_name)
+        target = "/".join(name for name in (pool_name, schema_name, collection_name) if name is not None)
+        print(f"Rolled back {target} to {timestamp}: {undone} operations undone.")
+
+    def begin(self):
+        if self.transaction is not None:
+            print(f"Transaction {self.transaction.id} is already open.")
+            return
+        self.transaction = self.data_storage_system.begin()
+        print(f"Transaction {self.transaction.id} started.")
+
+    def commit(self):
+        if self.transaction is None:
+            print("No open transaction.")
+            return
+        transaction, self.transaction = self.transaction, None
+        count = self.data_storage_system.commit(transaction)
+        print(f"Transaction {transaction.id} committed: {count} operations.")
+
+    def abort(self):
+        if self.transaction is None:
+            print("No open transaction.")
+            return
+        transaction, self.transaction = self.transaction, None
+        self.data_storage_system.abort(transaction)
+        print(f"Transaction {transaction.id} aborted.")
+
+    def add_record(self, pool_name, schema_name, collection_name, key, *value_parts):
+        value = ' '.join(value_parts)
+        if self.transaction is not None:
+            self.transaction.add(pool_name, schema_name, collection_name, key, value)
+            print(f"Add of {key} buffered in transaction {self.transaction.id}.")
+            return
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.add(key, value)
+            print(f"Record added to collection {collection_name} in pool {pool_name}.")
+
+    def update_record(self, pool_name, schema_name, collection_name, key, *value_parts):
+        value = ' '.join(value_parts)
+        if self.transaction is not None:
+            self.transaction.update(pool_name, schema_name, collection_name, key, value)
+            print(f"Update of {key} buffered in transaction {self.transaction.id}.")
+            return
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.update(key, value)
+            print(f"Record updated in collection {collection_name} in pool {pool_name}.")
+
+    def delete_record(self, pool_name, schema_name, collection_name, key):
+        if self.transaction is not None:
+            self.transaction.delete(pool_name, schema_name, collection_name, key)
+            print(f"Delete of {key} buffered in transaction {self.transaction.id}.")
+            return
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is not None:
+            collection.delete(key)
+            print(f"Record deleted from collection {collection_name} in pool {pool_name}.")
+
+    def apply_batch(self, operations):
+        # Пакет из HTTP: отдельная транзакция, не связанная с BEGIN в консоли
+        transaction = self.data_storage_system.begin()
+        for op, pool_name, schema_name, collection_name, key, value in operations:
+            if op == "add":
+                transaction.add(pool_name, schema_name, collection_name, key, value)
+            elif op == "update":
+                transaction.update(pool_name, schema_name, collection_name, key, value)
+            elif op == "delete":
+                transaction.delete(pool_name, schema_name, collection_name, key)
+            else:
+                raise ValueError(f"Unknown batch operation '{op}'.")
+        return self.data_storage_system.commit(transaction)
+
+    def get_records(self, pool_name, schema_name, collection_name, keys):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is None:
+            return None
+        return collection.get_many(keys)
+
+    def search_records(self, pool_name, schema_name, collection_name, index_name, query):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is None:
+            return None
+        return collection.get_many(collection.search(index_name, query))
+
+    def get_bloom_stats(self, pool_name, schema_name, collection_name):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is None:
+            return None
+        return collection.bloom_stats()
+
+    def add_records(self, pool_name, schema_name, collection_name, items):
+        collection = self._get_collection(pool_name, schema_name, collection_name)
+        if collection is None:
+            return False
+        collection.add_many(items)
+        print(f"{len(items)} records added to collection {collection_name} in pool {pool_name}.")
+        return True
+
     def save_state(self, filename):
         self.state_manager.save_state(filename)
         print(f"State saved to {filename}.")
 
+    def save_incremental(self, directory):
+        self.state_manager.save_incremental(directory)
+        print(f"Changed collections saved to {directory}.")
+
+    def merge_snapshot(self, directory):
+        self.state_manager.save_incremental(directory, merge=True)
+        print(f"Snapshot in {directory} merged into a new base.")
+
+    def bgsave(self, filename):
+        self.state_manager.bgsave(filename)
+        print(f"Background saving to {filename} started.")
+
+    def lastsave(self):
+        for name, value in self.state_manager.save_info().items():
+            print(f"{name}: {value}")
+
     def load_state(self, filename):
         self.state_manager.load_state(filename)
         print(f"State loaded from {filename}.")
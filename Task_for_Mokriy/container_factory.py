@@ -1,15 +1,45 @@
 from avl_tree import AVLTree
 from red_black_tree import RedBlackTree
 from btree import BTree
+from bplus_tree import BPlusTree
+from paged_btree import PagedBTree
+from sorted_list import SortedListContainer
+from hash_container import HashContainer, AdaptiveContainer
+from persistent_avl_tree import PersistentAVLTree
+from skip_list import SkipList
 
 class ContainerFactory:
     @staticmethod
-    def create_container(container_type):
+    def create_container(container_type, **options):
         if container_type == "AVL":
             return AVLTree()
-        elif container_type == "RedBlack":
+        elif container_type in ("RedBlack", "RED_BLACK"):
             return RedBlackTree()
         elif container_type == "BTREE":
             return BTree()
+        elif container_type == "BPLUSTREE":
+            return BPlusTree()
+        elif container_type == "PAGED_BTREE":
+            return PagedBTree(**options)
+        elif container_type == "SORTED_LIST":
+            return SortedListContainer()
+        elif container_type == "HASH":
+            return HashContainer()
+        elif container_type == "ADAPTIVE":
+            return AdaptiveContainer()
+        elif container_type == "PERSISTENT_AVL":
+            return PersistentAVLTree(**options)
+        elif container_type == "SKIP_LIST":
+            return SkipList()
         else:
             raise ValueError("Unsupported container type")
+
+    @staticmethod
+    def load_container(container_type, sorted_items, **options):
+        if container_type == "BTREE":
+            return BTree.bulk_load(sorted_items)
+        elif container_type == "BPLUSTREE":
+            return BPlusTree.bulk_load(sorted_items)
+        container = ContainerFactory.create_container(container_type, **options)
+        container.add_many(sorted_items)
+        return container
@@ -1,10 +1,19 @@
+import itertools
+import os
+import threading
+
 from persistence import PersistenceManager, AddCommand, UpdateCommand, DeleteCommand
 from flyweight import StringPool
-from index import IndexManager
-from avl_tree import AVLTree
-from red_black_tree import RedBlackTree
-from btree import BTree
+from bloom_filter import BLOOM_FP_RATE, build_filter
+from query_planner import QueryPlanner
+from index import IndexManager, FullTextIndex
+from container_factory import ContainerFactory
+from paged_btree import DATA_DIR, PagedBTree
 from my_collections.secondary_index import SecondaryIndex
+from transaction import Transaction
+from wal import (WriteAheadLog, WAL_DIR, OP_ADD, OP_UPDATE, OP_DELETE, OP_BATCH, OP_ADD_POOL,
+                 OP_REMOVE_POOL, OP_ADD_SCHEMA, OP_REMOVE_SCHEMA, OP_ADD_COLLECTION, OP_REMOVE_COLLECTION,
+                 OP_CREATE_INDEX, OP_BLOOM_FILTER)
 
 class AssociativeContainer:
     def add(self, key, value):
@@ -13,6 +22,61 @@ class AssociativeContainer:
     def get(self, key):
         raise NotImplementedError
 
+    def get_many(self, keys):
+        bloom = self.bloom
+        if bloom is None:
+            return self._fetch_many(keys)
+        # Ключи, отсечённые фильтром, сразу получают None
+        result = dict.fromkeys(keys)
+        found = self._fetch_many([key for key in result if bloom.might_contain(key)])
+        bloom.false_positives += sum(1 for value in found.values() if value is None)
+        result.update(found)
+        return result
+
+    def _fetch_many(self, keys):
+        if isinstance(self.data, dict):
+            return {key: self.data.get(key) for key in keys}
+        return self.data.get_many(keys)
+
+    def add_many(self, items):
+        items = sorted(items, key=lambda item: item[0])
+        for i in range(1, len(items)):
+            if items[i - 1][0] == items[i][0]:
+                raise KeyError(f"Duplicate key '{items[i][0]}'.")
+        existing = self.get_many([key for key, _ in items])
+        if any(value is not None for value in existing.values()):
+            raise KeyError("Key already exists.")
+        items = [(key, self.string_pool.get_string(value)) for key, value in items]
+        if isinstance(self.data, dict):
+            self.data.update(items)
+        else:
+            self.data.add_many(items)
+        self.persistence_manager.record_batch([AddCommand(self, key, value) for key, value in items])
+        self._reindex(items)
+        self.dirty = True
+        if self.wal is not None:
+            self.wal.append_many([(OP_ADD, self.wal_target, key, value) for key, value in items])
+
+    def delete_many(self, keys):
+        values = self.get_many(keys)
+        if any(value is None for value in values.values()):
+            raise KeyError("Key does not exist.")
+        commands = []
+        for key, value in values.items():
+            command = DeleteCommand(self, key)
+            command.deleted_value = value
+            commands.append(command)
+        if isinstance(self.data, dict):
+            for key in values:
+                del self.data[key]
+        else:
+            self.data.delete_many(values)
+        self.persistence_manager.record_batch(commands)
+        self._reindex([(key, None) for key in values])
+        self.dirty = True
+        if self.wal is not None:
+            self.wal.append_many([(OP_DELETE, self.wal_target, key, None) for key in values])
+
     def get_range(self, min_bound, max_bound):
         raise NotImplementedError
 
@@ -23,56 +87,231 @@ class AssociativeContainer:
         raise NotImplementedError
 
 class DataCollection(AssociativeContainer):
-    def __init__(self, name):
+    bloom = None  # Фильтр Блума по ключам, включается enable_bloom_filter
+    statistics = None  # Статистика планировщика: поле -> ColumnStatistics
+    changes = 0  # Счётчик изменённых записей, по нему статистика устаревает
+
+    def __init__(self, name, container_type="default", items=None, **options):
         self.name = name
-        self.data = {}
-        self.persistence_manager = PersistenceManager()
+        self.container_type = container_type
+        self.persistence_manager = PersistenceManager(self)
         self.string_pool = StringPool()
         self.index_manager = IndexManager()
+        self.wal = None
+        self.wal_target = None  # (пул, схема, коллекция) в записях журнала
+        self.dirty = True  # Изменилась после последнего инкрементального снимка
+        if items is not None:
+            self.data = self._load(items, **options)
+        elif container_type == "default":
+            self.data = {}
+        else:
+            self.data = ContainerFactory.create_container(container_type, **options)
+
+    # Журнал держит открытый файл и поток, в снимок он не попадает
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["wal"] = None
+        return state
+
+    def attach_wal(self, wal, target):
+        self.wal = wal
+        self.wal_target = target
+
+    def _log(self, op, key, value=None):
+        if self.wal is not None:
+            self.wal.append(op, self.wal_target, key, value)
+
+    def _reindex(self, changes):
+        # changes - пары (ключ, новое значение или None для удалённого)
+        self.changes += len(changes)
+        indexes = self.index_manager.text_indexes()
+        bloom = self.bloom
+        if not indexes and bloom is None:
+            return
+        for key, value in changes:
+            for index in indexes:
+                index.index_document(key, value)
+            if bloom is not None:
+                if value is None:
+                    bloom.removed += 1
+                else:
+                    bloom.add(key)
+        if bloom is not None and bloom.needs_rebuild():
+            self.bloom = bloom.rebuild(self.data.keys())
+
+    def enable_bloom_filter(self, expected_keys=None, fp_rate=BLOOM_FP_RATE):
+        self.bloom = build_filter(self.data.keys(), fp_rate, self.bloom, expected_keys)
+        self.dirty = True
+        self._log(OP_BLOOM_FILTER, None, (expected_keys, fp_rate))
+
+    def disable_bloom_filter(self):
+        self.bloom = None
+        self.dirty = True
+        self._log(OP_BLOOM_FILTER, None, None)
+
+    def enable_index_bloom_filter(self, index_name, expected_keys=None, fp_rate=BLOOM_FP_RATE):
+        self.index_manager.enable_bloom_filter(index_name, expected_keys, fp_rate)
+        self.dirty = True
+        self._log(OP_BLOOM_FILTER, index_name, (expected_keys, fp_rate))
+
+    def bloom_stats(self):
+        return {
+            "collection": self.bloom.stats() if self.bloom is not None else None,
+            "indexes": self.index_manager.bloom_stats(),
+        }
+
+    def contains(self, key):
+        # Большинство промахов фильтр отсекает без спуска по дереву
+        bloom = self.bloom
+        if bloom is not None and not bloom.might_contain(key):
+            return False
+        found = key in self.data
+        if not found and bloom is not None:
+            bloom.false_positives += 1
+        return found
+
+    def _load(self, items, **options):
+        # Загруженные записи становятся исходным состоянием коллекции,
+        # в историю команд они не попадают
+        items = sorted(items, key=lambda item: item[0])
+        for i in range(1, len(items)):
+            if items[i - 1][0] == items[i][0]:
+                raise KeyError(f"Duplicate key '{items[i][0]}'.")
+        items = [(key, self.string_pool.get_string(value)) for key, value in items]
+        if self.container_type == "default":
+            return dict(items)
+        return ContainerFactory.load_container(self.container_type, items, **options)
 
     def add(self, key, value):
-        if key in self.data:
+        if self.contains(key):
             raise KeyError("Key already exists.")
         value = self.string_pool.get_string(value)
         self.persistence_manager.execute_command(AddCommand(self, key, value))
-        self.data[key] = value
+        self._reindex(((key, value),))
+        self.dirty = True
+        self._log(OP_ADD, key, value)
 
     def get(self, key):
-        return self.data.get(key, None)
+        bloom = self.bloom
+        if bloom is not None and not bloom.might_contain(key):
+            return None
+        value = self.data.get(key)
+        if value is None and bloom is not None:
+            bloom.false_positives += 1
+        return value
 
     def get_range(self, min_bound, max_bound):
-        return {k: v for k, v in self.data.items() if min_bound <= k <= max_bound}
+        if isinstance(self.data, dict):
+            return {k: v for k, v in self.data.items() if min_bound <= k <= max_bound}
+        return dict(self.data.range(min_bound, max_bound))
+
+    def rank(self, key):
+        if isinstance(self.data, dict):
+            return sum(1 for k in self.data if k < key)
+        return self.data.rank(key)
+
+    def select(self, index):
+        if isinstance(self.data, dict):
+            key = sorted(self.data)[index]
+            return key, self.data[key]
+        return self.data.select(index)
+
+    def count_range(self, min_bound, max_bound):
+        if isinstance(self.data, dict):
+            return sum(1 for k in self.data if min_bound <= k <= max_bound)
+        return self.data.count_range(min_bound, max_bound)
 
     def update(self, key, value):
-        if key not in self.data:
+        if not self.contains(key):
             raise KeyError("Key does not exist.")
         value = self.string_pool.get_string(value)
         self.persistence_manager.execute_command(UpdateCommand(self, key, value))
-        self.data[key] = value
+        self._reindex(((key, value),))
+        self.dirty = True
+        self._log(OP_UPDATE, key, value)
 
     def delete(self, key):
-        if key in self.data:
+        if self.contains(key):
             self.persistence_manager.execute_command(DeleteCommand(self, key))
-            del self.data[key]
+            self._reindex(((key, None),))
+            self.dirty = True
+            self._log(OP_DELETE, key)
         else:
             raise KeyError("Key does not exist.")
 
+    def set_retention(self, max_age=None, max_entries=None, max_bytes=None):
+        self.persistence_manager.set_retention(max_age, max_entries, max_bytes)
+        self.persistence_manager.enforce_retention()
+        self.dirty = True
+
+    def rollback_to(self, timestamp):
+        undone = self.persistence_manager.rollback_to(timestamp)
+        self._reindex(undone)
+        self.dirty = True
+        if self.wal is not None:
+            self.wal.append_many([(OP_DELETE if value is None else OP_UPDATE, self.wal_target, key, value)
+                                  for key, value in undone])
+        return len(undone)
+
+    def apply_batch(self, operations):
+        # Операции транзакции уже проверены: применяем их одним проходом
+        # и пишем в историю одну составную запись
+        entries = []
+        for op, key, value in operations:
+            if op == OP_ADD:
+                command = AddCommand(self, key, self.string_pool.get_string(value))
+            elif op == OP_UPDATE:
+                command = UpdateCommand(self, key, self.string_pool.get_string(value))
+            else:
+                command = DeleteCommand(self, key)
+            command.execute()
+            entries.append(command.entry())
+        self.persistence_manager.record_compound(entries)
+        self._reindex([(key, None if op == OP_DELETE else value) for op, key, value, _ in entries])
+        self.dirty = True
+
     def get_state_at(self, timestamp):
         return self.persistence_manager.get_state_at(timestamp)
 
-    def create_index(self, index_name):
-        self.index_manager.create_index(index_name)
+    def get_value_at(self, key, timestamp):
+        return self.persistence_manager.get_value_at(key, timestamp)
+
+    def create_index(self, index_name, kind="hash", **options):
+        index = self.index_manager.create_index(index_name, kind, **options)
+        if isinstance(index, FullTextIndex):
+            index.build(self.data.items())
+        self.dirty = True
+        self._log(OP_CREATE_INDEX, index_name, (kind, options))
 
     def search_index(self, index_name, key):
         index = self.index_manager.get_index(index_name)
-        if index:
+        if index is not None:
             return index.search(key)
         else:
             raise KeyError("Index does not exist.")
 
+    def search(self, index_name, query):
+        index = self.index_manager.get_index(index_name)
+        if isinstance(index, FullTextIndex):
+            return index.search(query)
+        else:
+            raise KeyError("Text index does not exist.")
+
+    def query(self, predicates):
+        planner = QueryPlanner(self)
+        plan, _ = planner.plan(predicates)
+        return planner.execute(plan)
+
+    def explain(self, predicates):
+        # Выбранный план и все рассмотренные варианты
+        return QueryPlanner(self).plan(predicates)
+
+    def analyze(self):
+        QueryPlanner(self).analyze()
+
     def search_index_range(self, index_name, min_key, max_key):
         index = self.index_manager.get_index(index_name)
-        if index:
+        if index is not None:
             return index.search_range(min_key, max_key)
         else:
             raise KeyError("Index does not exist.")
@@ -82,10 +321,10 @@ class DataSchema:
         self.name = name
         self.collections = {}
 
-    def add_collection(self, collection_name):
+    def add_collection(self, collection_name, container_type="default", items=None, **options):
         if collection_name in self.collections:
             raise KeyError(f"Collection '{collection_name}' already exists in schema '{self.name}'.")
-        self.collections[collection_name] = DataCollection(collection_name)
+        self.collections[collection_name] = DataCollection(collection_name, container_type, items, **options)
 
     def remove_collection(self, collection_name):
         if collection_name in self.collections:
@@ -126,61 +365,227 @@ class DataStorageSystem:
     def __init__(self):
         self.pools = {}
         self.secondary_indexes = {}  # Добавляем и инициализируем secondary_indexes
+        self.wal = None
+        self.lock = threading.Lock()  # Применение транзакций
+        self.transaction_ids = itertools.count(1)
+
+    def enable_wal(self, directory=WAL_DIR, durability="interval", **options):
+        self.wal = WriteAheadLog(directory, durability, **options)
+        self.attach_wal()
+
+    def attach_wal(self):
+        for pool_name, pool in self.pools.items():
+            for schema_name, schema in pool.schemas.items():
+                for collection_name, collection in schema.collections.items():
+                    collection.attach_wal(self.wal, (pool_name, schema_name, collection_name))
+
+    def _log(self, op, target, key=None, value=None):
+        if self.wal is not None:
+            self.wal.append(op, target, key, value)
+
+    def replay_wal(self):
+        # Журнал доигрывается поверх последнего снимка. Записи, сделанные
+        # во время сохранения, могут уже быть в снимке, поэтому каждая
+        # применяется идемпотентно, а повторно в журнал не пишется
+        wal, self.wal = self.wal, None
+        try:
+            for op, target, key, value in wal.replay():
+                self._apply_record(op, target, key, value)
+        finally:
+            self.wal = wal
+            self.attach_wal()
+
+    def _apply_record(self, op, target, key, value):
+        if op == OP_ADD_POOL:
+            self.add_pool(*target)
+        elif op == OP_REMOVE_POOL:
+            self.remove_pool(*target)
+        elif op == OP_ADD_SCHEMA:
+            self.add_schema(*target)
+        elif op == OP_REMOVE_SCHEMA:
+            self.remove_schema(*target)
+        elif op == OP_ADD_COLLECTION:
+            if self.get_collection(*target) is None:
+                # В старых журналах записан только тип контейнера
+                container_type, options = value if isinstance(value, tuple) else (value, {})
+                self.add_collection(*target, container_type, **options)
+        elif op == OP_REMOVE_COLLECTION:
+            self.remove_collection(*target)
+        elif op == OP_CREATE_INDEX:
+            collection = self.get_collection(*target)
+            if collection is not None and collection.index_manager.get_index(key) is None:
+                kind, options = value
+                collection.create_index(key, kind, **options)
+        elif op == OP_BLOOM_FILTER:
+            # Фильтр строится по текущим ключам, так что повторное включение безвредно
+            collection = self.get_collection(*target)
+            if collection is None:
+                return
+            if key is None and value is None:
+                collection.disable_bloom_filter()
+            elif key is None:
+                collection.enable_bloom_filter(*value)
+            elif collection.index_manager.get_index(key) is not None:
+                collection.enable_index_bloom_filter(key, *value)
+        elif op == OP_BATCH:
+            for collection, operations in self._plan_batch(value, strict=False):
+                collection.apply_batch(operations)
+        else:
+            collection = self.get_collection(*target)
+            if collection is None:
+                return
+            if op == OP_DELETE:
+                if key in collection.data:
+                    collection.delete(key)
+            elif key in collection.data:
+                collection.update(key, value)
+            else:
+                collection.add(key, value)
+
+    def begin(self):
+        return Transaction(next(self.transaction_ids))
+
+    def abort(self, transaction):
+        transaction.operations.clear()
+
+    def commit(self, transaction):
+        # Сначала проверяются все операции, потом всё применяется разом:
+        # при ошибке проверки коллекции не меняются вовсе
+        with self.lock:
+            plan = self._plan_batch(transaction.operations, strict=True)
+            for collection, operations in plan:
+                collection.apply_batch(operations)
+            if self.wal is not None and transaction.operations:
+                self.wal.append(OP_BATCH, None, None, transaction.operations)
+        count = len(transaction.operations)
+        transaction.operations = []
+        return count
+
+    def _plan_batch(self, operations, strict):
+        # Раскладывает операции по коллекциям, отслеживая наличие ключей с учётом
+        # более ранних операций той же транзакции. При повторе из журнала
+        # (strict=False) операции приводятся к идемпотентному виду
+        plan = {}
+        present = {}
+        for op, target, key, value in operations:
+            target = tuple(target)
+            collection = self.get_collection(*target)
+            if collection is None:
+                if strict:
+                    raise KeyError(f"Collection '{'/'.join(target)}' does not exist.")
+                continue
+            if strict and op != OP_DELETE and value is None:
+                raise ValueError(f"Value for key '{key}' is missing.")
+            exists = present.get((target, key))
+            if exists is None:
+                exists = key in collection.data
+            if op == OP_ADD and exists:
+                if strict:
+                    raise KeyError(f"Key '{key}' already exists in '{'/'.join(target)}'.")
+                op = OP_UPDATE
+            elif op != OP_ADD and not exists:
+                if strict:
+                    raise KeyError(f"Key '{key}' does not exist in '{'/'.join(target)}'.")
+                if op == OP_DELETE:
+                    continue
+                op = OP_ADD
+            present[(target, key)] = op != OP_DELETE
+            plan.setdefault(target, (collection, []))[1].append((op, key, value))
+        return list(plan.values())
 
     def add_pool(self, pool_name):
         if pool_name not in self.pools:
-            self.pools[pool_name] = {}
+            self.pools[pool_name] = DataPool()
+            self._log(OP_ADD_POOL, (pool_name,))
 
     def remove_pool(self, pool_name):
         if pool_name in self.pools:
-            del self.pools[pool_name]
+            pool = self.pools.pop(pool_name)
+            for schema in pool.schemas.values():
+                self._drop_storage(schema.collections.values())
+            self._log(OP_REMOVE_POOL, (pool_name,))
 
     def get_pool(self, pool_name):
         return self.pools.get(pool_name, None)
 
     def add_schema(self, pool_name, schema_name):
         pool = self.get_pool(pool_name)
-        if pool:
-            pool[schema_name] = {}
+        if pool is not None and pool.get_schema(schema_name) is None:
+            pool.add_schema(schema_name)
+            self._log(OP_ADD_SCHEMA, (pool_name, schema_name))
 
     def remove_schema(self, pool_name, schema_name):
         pool = self.get_pool(pool_name)
-        if pool and schema_name in pool:
-            del pool[schema_name]
+        if pool is not None and pool.get_schema(schema_name) is not None:
+            schema = pool.get_schema(schema_name)
+            pool.remove_schema(schema_name)
+            self._drop_storage(schema.collections.values())
+            self._log(OP_REMOVE_SCHEMA, (pool_name, schema_name))
 
     def get_schema(self, pool_name, schema_name):
         pool = self.get_pool(pool_name)
-        if pool:
-            return pool.get(schema_name, None)
+        if pool is not None:
+            return pool.get_schema(schema_name)
         return None
 
-    def add_collection(self, pool_name, schema_name, collection_name, container_type):
+    def add_collection(self, pool_name, schema_name, collection_name, container_type="default", items=None, **options):
         schema = self.get_schema(pool_name, schema_name)
-        if schema:
-            if container_type == "AVL":
-                container = AVLTree()
-            elif container_type == "RED_BLACK":
-                container = RedBlackTree()
-            elif container_type == "BTREE":
-                container = BTree()
-            else:
-                raise ValueError(f"Unsupported container type: {container_type}")
-
-            schema[collection_name] = container
+        if schema is not None:
+            if container_type == "PAGED_BTREE" and "path" not in options:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                options["path"] = os.path.join(DATA_DIR, f"{pool_name}.{schema_name}.{collection_name}.db")
+            schema.add_collection(collection_name, container_type, items, **options)
+            target = (pool_name, schema_name, collection_name)
+            if self.wal is not None:
+                collection = schema.get_collection(collection_name)
+                collection.attach_wal(self.wal, target)
+                self.wal.append_many([(OP_ADD_COLLECTION, target, None, (container_type, options))] +
+                                     [(OP_ADD, target, key, value) for key, value in collection.data.items()])
             self.create_secondary_index(pool_name, schema_name, collection_name)
 
     def remove_collection(self, pool_name, schema_name, collection_name):
         schema = self.get_schema(pool_name, schema_name)
-        if schema and collection_name in schema:
-            del schema[collection_name]
-            self.remove_secondary_index(pool_name, schema_name, collection_name)
+        if schema is not None and schema.get_collection(collection_name) is not None:
+            collection = schema.get_collection(collection_name)
+            schema.remove_collection(collection_name)
+            self._drop_storage([collection])
+            self.secondary_indexes.pop((pool_name, schema_name, collection_name), None)
+            self._log(OP_REMOVE_COLLECTION, (pool_name, schema_name, collection_name))
+
+    def _drop_storage(self, collections):
+        # Файл страниц удалённой коллекции удаляется: путь выводится из имён,
+        # и новая коллекция с тем же именем иначе открыла бы старые данные
+        for collection in collections:
+            if isinstance(collection.data, PagedBTree):
+                collection.data.destroy()
 
     def get_collection(self, pool_name, schema_name, collection_name):
         schema = self.get_schema(pool_name, schema_name)
-        if schema:
-            return schema.get(collection_name, None)
+        if schema is not None:
+            return schema.get_collection(collection_name)
         return None
 
+    def rollback(self, timestamp, pool_name, schema_name=None, collection_name=None):
+        # Откат коллекции, схемы или всего пула. Сначала проверяем, что ни одна
+        # коллекция не свернула историю позже timestamp, чтобы не откатить часть
+        pool = self.get_pool(pool_name)
+        if pool is None:
+            raise KeyError(f"Pool '{pool_name}' does not exist.")
+        schemas = pool.schemas if schema_name is None else {schema_name: pool.get_schema(schema_name)}
+        collections = []
+        for name, schema in schemas.items():
+            if schema is None:
+                raise KeyError(f"Schema '{name}' does not exist in pool '{pool_name}'.")
+            if collection_name is None:
+                collections.extend(schema.collections.values())
+            elif schema.get_collection(collection_name) is None:
+                raise KeyError(f"Collection '{collection_name}' does not exist in schema '{name}'.")
+            else:
+                collections.append(schema.get_collection(collection_name))
+        for collection in collections:
+            collection.persistence_manager.check_retained(timestamp.timestamp())
+        return sum(collection.rollback_to(timestamp) for collection in collections)
+
     def create_secondary_index(self, pool_name, schema_name, collection_name):
         if (pool_name, schema_name, collection_name) not in self.secondary_indexes:
             self.secondary_indexes[(pool_name, schema_name, collection_name)] = {}
@@ -190,11 +595,11 @@ class DataStorageSystem:
 
     def add_secondary_index(self, pool_name, schema_name, collection_name, index_key):
         pool = self.get_pool(pool_name)
-        if pool:
-            schema = pool.get(schema_name)
-            if schema:
-                collection = schema.get(collection_name)
-                if collection:
+        if pool is not None:
+            schema = pool.get_schema(schema_name)
+            if schema is not None:
+                collection = schema.get_collection(collection_name)
+                if collection is not None:
                     index = SecondaryIndex(index_key)
                     collection.set_secondary_index(index)
                     print(
@@ -209,11 +614,11 @@ class DataStorageSystem:
 
     def remove_secondary_index(self, pool_name, schema_name, collection_name):
         pool = self.get_pool(pool_name)
-        if pool:
-            schema = pool.get(schema_name)
-            if schema:
-                collection = schema.get(collection_name)
-                if collection:
+        if pool is not None:
+            schema = pool.get_schema(schema_name)
+            if schema is not None:
+                collection = schema.get_collection(collection_name)
+                if collection is not None:
                     collection.remove_secondary_index()
                     print(
                         f"Secondary index removed from collection '{collection_name}' in schema '{schema_name}' in pool '{pool_name}'.")
@@ -227,9 +632,7 @@ class DataStorageSystem:
 
     def print_pools(self):
         print("Current pools:")
-        for pool_name, schemas in self.pools.items():
+        for pool_name, pool in self.pools.items():
             print(f"- Pool: {pool_name}")
-            for schema_name in schemas:
+            for schema_name in pool.schemas:
                 print(f"  - Schema: {schema_name}")
-
-
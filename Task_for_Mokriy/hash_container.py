@@ -0,0 +1,120 @@
+from associative_container import AssociativeContainer
+from avl_tree import AVLTree
+
+
+# hash_container.py
+
+class HashContainer(AssociativeContainer):
+    # Точечный доступ за O(1); упорядоченные операции сортируют ключи на каждый вызов
+    def __init__(self):
+        super().__init__()
+        self.data = {}
+
+    def add(self, key, value):
+        self.data[key] = value
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def update(self, key, value):
+        if key not in self.data:
+            raise KeyError(f"Key '{key}' not found.")
+        self.data[key] = value
+
+    def delete(self, key):
+        if key not in self.data:
+            raise KeyError(f"Key '{key}' not found.")
+        del self.data[key]
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get_many(self, keys):
+        return {key: self.data.get(key) for key in keys}
+
+    def add_many(self, items):
+        self.data.update(items)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    # Полный обход идёт по словарю напрямую, без сортировки: порядок ключей
+    # нужен только range, rank, select и count_range
+    def __iter__(self):
+        return iter(self.data)
+
+    def keys(self):
+        return self.data.keys()
+
+    def values(self):
+        return self.data.values()
+
+    def items(self):
+        return self.data.items()
+
+    def range(self, lo=None, hi=None, reverse=False):
+        keys = sorted(key for key in self.data
+                      if (lo is None or key >= lo) and (hi is None or key <= hi))
+        if reverse:
+            keys.reverse()
+        for key in keys:
+            yield key, self.data[key]
+
+
+class AdaptiveContainer(HashContainer):
+    # Начинает как хеш; при первой упорядоченной операции строит дерево
+    # и дальше поддерживает оба, чтобы точечные чтения остались O(1)
+    def __init__(self, ordered_class=AVLTree):
+        super().__init__()
+        self.ordered_class = ordered_class
+        self.ordered = None
+
+    @property
+    def promoted(self):
+        return self.ordered is not None
+
+    def _promote(self):
+        if self.ordered is None:
+            self.ordered = self.ordered_class()
+            self.ordered.add_many(sorted(self.data.items(), key=lambda item: item[0]))
+        return self.ordered
+
+    def add(self, key, value):
+        super().add(key, value)
+        if self.ordered is not None:
+            self.ordered[key] = value
+
+    def update(self, key, value):
+        super().update(key, value)
+        if self.ordered is not None:
+            self.ordered.update(key, value)
+
+    def delete(self, key):
+        super().delete(key)
+        if self.ordered is not None:
+            self.ordered.delete(key)
+
+    def add_many(self, items):
+        items = list(items)
+        super().add_many(items)
+        if self.ordered is not None:
+            self.ordered.add_many(items)
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        super().delete_many(keys)
+        if self.ordered is not None:
+            self.ordered.delete_many(keys)
+
+    def range(self, lo=None, hi=None, reverse=False):
+        return self._promote().range(lo, hi, reverse)
+
+    def rank(self, key):
+        return self._promote().rank(key)
+
+    def select(self, index):
+        return self._promote().select(index)
+
+    def count_range(self, lo, hi):
+        return self._promote().count_range(lo, hi)
@@ -1,32 +1,223 @@
+import re
+
+from bloom_filter import BLOOM_FP_RATE, build_filter
+from container_factory import ContainerFactory
+from sorted_list import SortedListContainer
+
+# index.py
+# Хеш-индекс отвечает только на поиск по равенству. Упорядоченный индекс
+# держит ключи в сбалансированном контейнере проекта: диапазон находится
+# одним спуском и отдаётся ленивым итератором за O(log n + k).
+# Полнотекстовый индекс коллекция обновляет сама при каждой записи.
+
+INDEX_KINDS = ("hash", "ordered", "text")
+ORDERED_INDEX_CONTAINER = "SORTED_LIST"
+
+TOKEN = re.compile(r"\w+")
+QUERY_CLAUSE = re.compile(r'"([^"]*)"|(\S+)')
+EMPTY_POSTINGS = {}.keys()
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN.findall(str(text))]
+
 class SecondaryIndex:
+    bloom = None  # Фильтр Блума по ключам индекса, включается enable_bloom_filter
+    changes = 0  # Счётчик изменений для статистики планировщика
+
     def __init__(self):
         self.index = {}
 
     def add(self, key, value):
         self.index[key] = value
+        self.changes += 1
+        self._bloom_added(key)
 
     def update(self, key, value):
-        if key in self.index:
+        if self.contains(key):
             self.index[key] = value
 
     def delete(self, key):
-        if key in self.index:
+        if self.contains(key):
             del self.index[key]
+            self.changes += 1
+            self._bloom_removed()
+
+    def contains(self, key):
+        bloom = self.bloom
+        if bloom is not None and not bloom.might_contain(key):
+            return False
+        found = key in self.index
+        if not found and bloom is not None:
+            bloom.false_positives += 1
+        return found
 
     def search(self, key):
-        return self.index.get(key, None)
+        bloom = self.bloom
+        if bloom is not None and not bloom.might_contain(key):
+            return None
+        value = self.index.get(key)
+        if value is None and bloom is not None:
+            bloom.false_positives += 1
+        return value
 
     def search_range(self, min_key, max_key):
         return {k: v for k, v in self.index.items() if min_key <= k <= max_key}
 
+    def enable_bloom_filter(self, expected_keys=None, fp_rate=BLOOM_FP_RATE):
+        self.bloom = build_filter(self.index.keys(), fp_rate, self.bloom, expected_keys)
+
+    def disable_bloom_filter(self):
+        self.bloom = None
+
+    def _bloom_added(self, key):
+        if self.bloom is not None:
+            self.bloom.add(key)
+            self._bloom_check()
+
+    def _bloom_removed(self):
+        if self.bloom is not None:
+            self.bloom.removed += 1
+            self._bloom_check()
+
+    def _bloom_check(self):
+        if self.bloom.needs_rebuild():
+            self.bloom = self.bloom.rebuild(self.index.keys())
+
+class OrderedIndex(SecondaryIndex):
+    def __init__(self, container_type=ORDERED_INDEX_CONTAINER):
+        self.container_type = container_type
+        self.index = ContainerFactory.create_container(container_type)
+
+    def add(self, key, value):
+        self.index.add(key, value)
+        self.changes += 1
+        self._bloom_added(key)
+
+    def update(self, key, value):
+        if self.contains(key):
+            self.index.update(key, value)
+
+    def delete(self, key):
+        if self.contains(key):
+            self.index.delete(key)
+            self.changes += 1
+            self._bloom_removed()
+
+    def search_range(self, min_key, max_key):
+        # Генератор пар (ключ, значение) по возрастанию ключа
+        return self.index.range(min_key, max_key)
+
+class FullTextIndex:
+    # Инвертированный индекс с позициями: терм -> {ключ: позиции терма в значении}.
+    # Термы лежат в отсортированном контейнере, поэтому префикс - это диапазон.
+    # Для каждого ключа запоминаем его термы, чтобы при изменении или удалении
+    # записи снять старые позиции без старого значения
+    def __init__(self):
+        self.postings = SortedListContainer()
+        self.documents = {}
+
+    def index_document(self, key, value):
+        # value=None - запись удалена
+        for term in self.documents.pop(key, ()):
+            posting = self.postings.get(term)
+            del posting[key]
+            if not posting:
+                self.postings.delete(term)
+        if value is None:
+            return
+        positions = {}
+        for position, term in enumerate(tokenize(value)):
+            positions.setdefault(term, []).append(position)
+        for term, term_positions in positions.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = {}
+                self.postings.add(term, posting)
+            posting[key] = tuple(term_positions)
+        if positions:
+            self.documents[key] = tuple(positions)
+
+    def build(self, items):
+        for key, value in items:
+            self.index_document(key, value)
+
+    def search_term(self, term):
+        posting = self.postings.get(term.lower())
+        if posting is None:
+            return EMPTY_POSTINGS
+        return posting.keys()
+
+    def search_prefix(self, prefix):
+        prefix = prefix.lower()
+        found = {}
+        for term, posting in self.postings.range(prefix):
+            if not term.startswith(prefix):
+                break
+            found.update(dict.fromkeys(posting))
+        return found.keys()
+
+    def search_phrase(self, phrase):
+        terms = tokenize(phrase)
+        postings = [self.postings.get(term) for term in terms]
+        if not terms or any(posting is None for posting in postings):
+            return []
+        # Кандидаты - ключи самого редкого терма, позиции сверяем только у них
+        matches = []
+        for key in min(postings, key=len):
+            if not all(key in posting for posting in postings):
+                continue
+            following = [set(posting[key]) for posting in postings[1:]]
+            for start in postings[0][key]:
+                if all(start + i in positions for i, positions in enumerate(following, 1)):
+                    matches.append(key)
+                    break
+        return matches
+
+    def search(self, query):
+        # Условия через пробел объединяются по AND: слово, префикс
+        # со звёздочкой на конце или фраза в кавычках
+        result = None
+        for phrase, word in QUERY_CLAUSE.findall(query):
+            if word.endswith("*"):
+                keys = self.search_prefix(word[:-1])
+            elif phrase or len(tokenize(word)) != 1:
+                keys = self.search_phrase(phrase or word)
+            else:
+                keys = self.search_term(tokenize(word)[0])
+            result = set(keys) if result is None else result.intersection(keys)
+            if not result:
+                return []
+        return sorted(result) if result else []
+
 class IndexManager:
     def __init__(self):
         self.indices = {}
 
-    def create_index(self, index_name):
+    def create_index(self, index_name, kind="hash", container_type=ORDERED_INDEX_CONTAINER):
         if index_name in self.indices:
             raise KeyError("Index already exists.")
-        self.indices[index_name] = SecondaryIndex()
+        if kind == "hash":
+            self.indices[index_name] = SecondaryIndex()
+        elif kind == "ordered":
+            self.indices[index_name] = OrderedIndex(container_type)
+        elif kind == "text":
+            self.indices[index_name] = FullTextIndex()
+        else:
+            raise ValueError(f"Unsupported index kind '{kind}'.")
+        return self.indices[index_name]
 
     def get_index(self, index_name):
         return self.indices.get(index_name, None)
+
+    def enable_bloom_filter(self, index_name, expected_keys=None, fp_rate=BLOOM_FP_RATE):
+        index = self.indices.get(index_name)
+        if not isinstance(index, SecondaryIndex):
+            raise KeyError("Index does not exist.")
+        index.enable_bloom_filter(expected_keys, fp_rate)
+
+    def bloom_stats(self):
+        return {name: index.bloom.stats() for name, index in self.indices.items()
+                if isinstance(index, SecondaryIndex) and index.bloom is not None}
+
+    def text_indexes(self):
+        return [index for index in self.indices.values() if isinstance(index, FullTextIndex)]
@@ -0,0 +1,243 @@
+import contextlib
+import mmap
+import multiprocessing
+import os
+import pickle
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from data_storage import DataCollection
+
+
+# lazy_snapshot.py
+# Снимок из сегментов: каждая коллекция сериализуется отдельно, сжимается zlib
+# и снабжается crc32, в конце файла лежит оглавление со смещениями. При загрузке
+# читается только оглавление, а коллекции декодируются из mmap при первом обращении.
+
+MAGIC = b"SEGSNAP2"
+HEADER = struct.Struct("<8sQQ")  # magic, смещение и длина оглавления
+COMPRESS_LEVEL = 6
+WRITE_BUFFER = 8 * 1024 * 1024
+SNAPSHOT_WORKERS = os.cpu_count() or 1
+
+_encode_source = None  # Пулы, которые рабочие процессы видят после fork
+
+
+def is_segmented(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def encode_segment(collection):
+    if isinstance(collection, FrozenCollection):
+        payload = collection.payload
+    else:
+        payload = pickle.dumps(collection, protocol=pickle.HIGHEST_PROTOCOL)
+    data = zlib.compress(payload, COMPRESS_LEVEL)
+    return data, zlib.crc32(data)
+
+
+class FrozenCollection:
+    # Коллекция, сериализованная в момент снимка: запись в фоновом потоке
+    # берёт готовые байты и не читает живые структуры, которые меняют писатели
+    def __init__(self, collection):
+        self.raw = LazyCollection.raw_segment(collection) if type(collection) is LazyCollection else None
+        self.payload = None
+        if self.raw is None:
+            self.payload = pickle.dumps(collection, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _encode_in_worker(target):
+    # Рабочий процесс унаследовал память родителя и сериализует коллекцию сам,
+    # поэтому pickle идёт параллельно, а по каналу едут уже сжатые байты
+    pool_name, schema_name, collection_name = target
+    collection = _encode_source[pool_name].schemas[schema_name].collections[collection_name]
+    return (target,) + encode_segment(collection)
+
+
+def _encoded_segments(pools, targets, workers, fork_guard=None):
+    global _encode_source
+    if workers > 1 and len(targets) > 1 and hasattr(os, "fork"):
+        _encode_source = pools
+        try:
+            # Рабочие процессы создаются fork'ом из многопоточного процесса:
+            # fork_guard держит блокировки, которые иначе достались бы им захваченными
+            with fork_guard() if fork_guard is not None else contextlib.nullcontext():
+                pool = multiprocessing.get_context("fork").Pool(min(workers, len(targets)))
+            with pool:
+                yield from pool.imap_unordered(_encode_in_worker, targets)
+        finally:
+            _encode_source = None
+    else:
+        for pool_name, schema_name, collection_name in targets:
+            collection = pools[pool_name].schemas[schema_name].collections[collection_name]
+            yield ((pool_name, schema_name, collection_name),) + encode_segment(collection)
+
+
+def write_segmented(filename, pools, secondary_indexes, workers=SNAPSHOT_WORKERS, fork_guard=None):
+    segments = {}
+    structure = {}
+    targets = []
+    with open(filename, 'wb', buffering=WRITE_BUFFER) as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+        for pool_name, pool in pools.items():
+            structure[pool_name] = {}
+            for schema_name, schema in pool.schemas.items():
+                structure[pool_name][schema_name] = list(schema.collections)
+                for collection_name, collection in schema.collections.items():
+                    target = (pool_name, schema_name, collection_name)
+                    # Не декодированная коллекция переносится из старого снимка как есть
+                    if isinstance(collection, FrozenCollection):
+                        raw = collection.raw
+                    else:
+                        raw = LazyCollection.raw_segment(collection)
+                    if raw is None:
+                        targets.append(target)
+                    else:
+                        segments[target] = (f.tell(), len(raw[0]), raw[1])
+                        f.write(raw[0])
+        for target, data, checksum in _encoded_segments(pools, targets, workers, fork_guard):
+            segments[target] = (f.tell(), len(data), checksum)
+            f.write(data)
+        toc = pickle.dumps({
+            'structure': structure,
+            'secondary_indexes': secondary_indexes,
+            'segments': segments,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        toc_offset = f.tell()
+        f.write(toc)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, toc_offset, len(toc)))
+
+
+class SegmentedSnapshot:
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, toc_offset, toc_length = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"File '{filename}' is not a segmented snapshot.")
+        toc = pickle.loads(self.map[toc_offset:toc_offset + toc_length])
+        self.structure = toc['structure']
+        self.secondary_indexes = toc['secondary_indexes']
+        self.segments = toc['segments']
+        self.lock = threading.Lock()
+        self.pending = {}  # Ещё не декодированные заглушки
+
+    def raw(self, target):
+        offset, length, checksum = self.segments[target]
+        return self.map[offset:offset + length], checksum
+
+    def inflate(self, target):
+        data, checksum = self.raw(target)
+        if zlib.crc32(data) != checksum:
+            raise ValueError(f"Checksum mismatch in snapshot segment {target} of '{self.filename}'.")
+        return zlib.decompress(data)
+
+    def decode(self, target, inflated=None):
+        if inflated is None:
+            inflated = self.inflate(target)
+        return pickle.loads(inflated)
+
+    def placeholder(self, target):
+        collection = LazyCollection(self, target)
+        self.pending[target] = collection
+        return collection
+
+    def warm_up(self, workers=SNAPSHOT_WORKERS):
+        # Фоновый прогрев: zlib отпускает GIL, поэтому сегменты распаковываются
+        # параллельно в потоках с опережением, а unpickle идёт здесь по одному
+        pending = list(self.pending.items())
+        with ThreadPoolExecutor(max(1, workers)) as executor:
+            inflated = executor.map(self.inflate, [target for target, _ in pending])
+            for (target, collection), data in zip(pending, inflated):
+                # Пока очередь дошла, заглушку могли уже декодировать по запросу
+                LazyCollection.materialize(collection, data)
+        self.close()
+
+    def pending_locks(self):
+        # Блокировки ещё не декодированных заглушек (для fork)
+        locks = (collection.__dict__.get('_lock') for collection in list(self.pending.values()))
+        return [lock for lock in locks if lock is not None]
+
+    def close(self):
+        with self.lock:
+            if not self.pending and not self.map.closed:
+                self.map.close()
+                self.file.close()
+
+
+class LazyCollection:
+    # Заглушка на месте коллекции из снимка. При обращении к любому
+    # атрибуту декодирует свой сегмент и превращается в DataCollection,
+    # так что все ссылки на неё дальше ведут на настоящую коллекцию
+    dirty = False
+
+    def __init__(self, snapshot, target):
+        self.__dict__['_snapshot'] = snapshot
+        self.__dict__['_target'] = target
+        self.__dict__['_lock'] = threading.Lock()  # Декодирование и подмена класса
+
+    def attach_wal(self, wal, target):
+        # Журнал подключается без декодирования и переносится при нём
+        lock = self.__dict__.get('_lock')
+        if lock is None:
+            DataCollection.attach_wal(self, wal, target)
+            return
+        with lock:
+            self.__dict__['wal'] = wal
+            self.__dict__['wal_target'] = target
+
+    def raw_segment(self):
+        # Сжатый сегмент из исходного снимка, пока коллекция не декодирована
+        lock = self.__dict__.get('_lock')
+        if lock is None:
+            return None
+        with lock:
+            if type(self) is not LazyCollection:
+                return None
+            return self._snapshot.raw(self._target)
+
+    def materialize(self, inflated=None):
+        lock = self.__dict__.get('_lock')
+        if lock is None:
+            return
+        with lock:
+            if type(self) is not LazyCollection:
+                return
+            snapshot, target = self._snapshot, self._target
+            collection = snapshot.decode(target, inflated)
+            state = collection.__dict__
+            state['dirty'] = False
+            for name in ('wal', 'wal_target'):
+                if name in self.__dict__:
+                    state[name] = self.__dict__[name]
+            state['persistence_manager'].collection = self
+            # Читатель без блокировки видит либо заглушку, либо все поля сразу:
+            # состояние ставится одним update, потом меняется класс, и только
+            # после этого убираются поля заглушки
+            self.__dict__.update(state)
+            self.__class__ = DataCollection
+            for name in ('_snapshot', '_target', '_lock'):
+                self.__dict__.pop(name, None)
+        snapshot.pending.pop(target, None)
+
+    def __getattr__(self, name):
+        # Поток, пришедший сюда во время чужого декодирования, ждёт его на
+        # блокировке, а materialize повторно проверяет класс и не декодирует дважды
+        if name.startswith('__'):
+            raise AttributeError(name)
+        LazyCollection.materialize(self)
+        if type(self) is LazyCollection:
+            raise AttributeError(name)
+        return getattr(self, name)
+
+    def __reduce_ex__(self, protocol):
+        LazyCollection.materialize(self)
+        return self.__reduce_ex__(protocol)
+
+    def __repr__(self):
+        return f"LazyCollection(target={self._target})"
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Dict, List, Optional
 
 class PoolRequest(BaseModel):
     name: str
@@ -18,6 +19,46 @@ class RecordRequest(BaseModel):
     key: str
     value: str
 
+class MultiRecordRequest(BaseModel):
+    pool_name: str
+    schema_name: str
+    collection_name: str
+    records: Dict[str, str]
+
+class MultiGetRequest(BaseModel):
+    pool_name: str
+    schema_name: str
+    collection_name: str
+    keys: List[str]
+
+class BatchOperation(BaseModel):
+    op: str
+    pool_name: str
+    schema_name: str
+    collection_name: str
+    key: str
+    value: Optional[str] = None
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+class IndexRequest(BaseModel):
+    pool_name: str
+    schema_name: str
+    collection_name: str
+    index_name: str
+    kind: str = "hash"
+
+class SearchRequest(BaseModel):
+    pool_name: str
+    schema_name: str
+    collection_name: str
+    index_name: str
+    query: str
+
+class SnapshotRequest(BaseModel):
+    filename: str
+
 class UserIn(BaseModel):
     username: str
     password: str
@@ -0,0 +1,230 @@
+from array import array
+from bisect import bisect_left
+
+# bitmap.py
+# Сжатый битмап в стиле roaring: номера строк делятся на чанки по 2^16,
+# в каждом чанке хранится либо отсортированный array('H') младших битов
+# (пока элементов не больше ARRAY_LIMIT), либо маска bytearray на 8 КБ.
+# Пересечение, объединение и разность идут по чанкам, а на масках - одной
+# операцией над int, без цикла по строкам.
+
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+CHUNK_BYTES = (1 << CHUNK_BITS) // 8
+ARRAY_LIMIT = 4096  # На большем числе элементов маска уже меньше массива
+
+
+def _to_bits(container):
+    if isinstance(container, bytearray):
+        return int.from_bytes(container, "little")
+    buffer = bytearray(CHUNK_BYTES)
+    for low in container:
+        buffer[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _iter_mask(mask):
+    for i, byte in enumerate(mask):
+        if byte:
+            base = i << 3
+            for j in range(8):
+                if byte >> j & 1:
+                    yield base + j
+
+
+def _count(container):
+    if isinstance(container, bytearray):
+        return int.from_bytes(container, "little").bit_count()
+    return len(container)
+
+
+def _from_bits(bits):
+    # Результат операции над масками: пустой чанк не хранится,
+    # редкий превращается обратно в массив
+    count = bits.bit_count()
+    if not count:
+        return None
+    mask = bytearray(bits.to_bytes(CHUNK_BYTES, "little"))
+    if count <= ARRAY_LIMIT:
+        return array("H", _iter_mask(mask))
+    return mask
+
+
+def _from_array(values):
+    if not values:
+        return None
+    if len(values) > ARRAY_LIMIT:
+        return bytearray(_to_bits(values).to_bytes(CHUNK_BYTES, "little"))
+    return values
+
+
+def _and(a, b):
+    if isinstance(a, array) and isinstance(b, array):
+        return _from_array(array("H", sorted(set(a).intersection(b))))
+    if isinstance(a, array) or isinstance(b, array):
+        # Массив проверяем по маске, не разворачивая её
+        values, mask = (a, b) if isinstance(a, array) else (b, a)
+        return _from_array(array("H", [low for low in values if mask[low >> 3] >> (low & 7) & 1]))
+    return _from_bits(_to_bits(a) & _to_bits(b))
+
+
+def _or(a, b):
+    if isinstance(a, array) and isinstance(b, array) and len(a) + len(b) <= ARRAY_LIMIT:
+        return _from_array(array("H", sorted(set(a).union(b))))
+    return _from_bits(_to_bits(a) | _to_bits(b))
+
+
+def _andnot(a, b):
+    if isinstance(a, array):
+        if isinstance(b, array):
+            excluded = set(b)
+            return _from_array(array("H", [low for low in a if low not in excluded]))
+        return _from_array(array("H", [low for low in a if not b[low >> 3] >> (low & 7) & 1]))
+    return _from_bits(_to_bits(a) & ~_to_bits(b))
+
+
+class Bitmap:
+    def __init__(self, rows=None):
+        self.chunks = {}  # старшие биты -> array('H') или маска
+        self.counts = {}  # старшие биты -> число строк в чанке
+        if rows is not None:
+            for row in rows:
+                self.add(row)
+
+    def add(self, row):
+        high, low = row >> CHUNK_BITS, row & CHUNK_MASK
+        container = self.chunks.get(high)
+        if container is None:
+            self.chunks[high] = array("H", (low,))
+            self.counts[high] = 1
+        elif isinstance(container, bytearray):
+            bit = 1 << (low & 7)
+            if not container[low >> 3] & bit:
+                container[low >> 3] |= bit
+                self.counts[high] += 1
+        else:
+            i = bisect_left(container, low)
+            if i == len(container) or container[i] != low:
+                container.insert(i, low)
+                self.chunks[high] = _from_array(container)
+                self.counts[high] += 1
+
+    def discard(self, row):
+        high, low = row >> CHUNK_BITS, row & CHUNK_MASK
+        container = self.chunks.get(high)
+        if container is None:
+            return
+        if isinstance(container, bytearray):
+            bit = 1 << (low & 7)
+            if not container[low >> 3] & bit:
+                return
+            container[low >> 3] &= ~bit & 0xFF
+            self.counts[high] -= 1
+            # Маска, поредевшая до порога, снова становится массивом
+            if self.counts[high] <= ARRAY_LIMIT:
+                self.chunks[high] = array("H", _iter_mask(container))
+        else:
+            i = bisect_left(container, low)
+            if i == len(container) or container[i] != low:
+                return
+            del container[i]
+            self.counts[high] -= 1
+            if not container:
+                del self.chunks[high]
+                del self.counts[high]
+
+    def __contains__(self, row):
+        container = self.chunks.get(row >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = row & CHUNK_MASK
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+    def __iter__(self):
+        for high in sorted(self.chunks):
+            base = high << CHUNK_BITS
+            container = self.chunks[high]
+            lows = _iter_mask(container) if isinstance(container, bytearray) else container
+            for low in lows:
+                yield base + low
+
+    def _combine(self, other, op, highs):
+        result = Bitmap()
+        for high in highs:
+            container = op(self.chunks[high], other.chunks[high])
+            if container is not None:
+                result.chunks[high] = container
+                result.counts[high] = _count(container)
+        return result
+
+    def __and__(self, other):
+        return self._combine(other, _and, self.chunks.keys() & other.chunks.keys())
+
+    def __or__(self, other):
+        result = self._combine(other, _or, self.chunks.keys() & other.chunks.keys())
+        for source in (self, other):
+            for high, container in source.chunks.items():
+                if high not in result.chunks:
+                    result.chunks[high] = container[:]
+                    result.counts[high] = source.counts[high]
+        return result
+
+    def __sub__(self, other):
+        result = self._combine(other, _andnot, self.chunks.keys() & other.chunks.keys())
+        for high, container in self.chunks.items():
+            if high not in other.chunks:
+                result.chunks[high] = container[:]
+                result.counts[high] = self.counts[high]
+        return result
+
+    def __eq__(self, other):
+        return isinstance(other, Bitmap) and self.chunks == other.chunks
+
+    def __repr__(self):
+        return f"Bitmap(rows={len(self)}, chunks={len(self.chunks)})"
+
+
+class RowIds:
+    # Плотные номера строк для ключей коллекции. Номера удалённых ключей
+    # переиспользуются, чтобы битмапы оставались плотными
+    def __init__(self):
+        self.ids = {}  # ключ -> номер строки
+        self.keys = []  # номер строки -> ключ
+        self.free = []
+        self.live = Bitmap()  # Все занятые номера, нужны для NOT
+
+    def assign(self, key):
+        row = self.ids.get(key)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+                self.keys[row] = key
+            else:
+                row = len(self.keys)
+                self.keys.append(key)
+            self.ids[key] = row
+            self.live.add(row)
+        return row
+
+    def release(self, key):
+        row = self.ids.pop(key, None)
+        if row is not None:
+            self.keys[row] = None
+            self.free.append(row)
+            self.live.discard(row)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+    def keys_of(self, bitmap):
+        keys = self.keys
+        return (keys[row] for row in bitmap)
@@ -1,27 +1,100 @@
+from my_collections.bitmap import RowIds
+from my_collections.secondary_index import BitmapIndex
+
+DEFAULT_INDEX = "default"
+
+
 class Collection:
     def __init__(self, name):
         self.name = name
         self.data = {}
-        self.secondary_index = None
+        self.indexes = {}  # имя -> SecondaryIndex, все обновляются при каждой записи
+        self.row_ids = None  # Номера строк, появляются с первым битмап-индексом
+
+    def add_index(self, index_name, index):
+        if index_name in self.indexes:
+            raise KeyError(f"Index '{index_name}' already exists.")
+        if isinstance(index, BitmapIndex):
+            if self.row_ids is None:
+                self.row_ids = RowIds()
+                for key in self.data:
+                    self.row_ids.assign(key)
+            index.row_ids = self.row_ids
+        index.build(self.data.items())
+        self.indexes[index_name] = index
+
+    def get_index(self, index_name):
+        return self.indexes.get(index_name, None)
+
+    def remove_index(self, index_name):
+        self.indexes.pop(index_name, None)
 
     def set_secondary_index(self, index):
-        self.secondary_index = index
+        self.remove_index(DEFAULT_INDEX)
+        self.add_index(DEFAULT_INDEX, index)
 
     def get_secondary_index(self):
-        return self.secondary_index
+        return self.get_index(DEFAULT_INDEX)
 
     def remove_secondary_index(self):
-        self.secondary_index = None
+        self.remove_index(DEFAULT_INDEX)
 
     def add(self, key, value):
+        if key in self.data:
+            self._replace(key, value)
+            return
         self.data[key] = value
+        if self.row_ids is not None:
+            self.row_ids.assign(key)
+        for index in self.indexes.values():
+            index.add(key, value)
 
-        if self.secondary_index:
-            self.secondary_index.add(key, value)
+    def update(self, key, value):
+        if key not in self.data:
+            raise KeyError(f"Key '{key}' not found.")
+        self._replace(key, value)
+
+    def _replace(self, key, value):
+        old_value = self.data[key]
+        self.data[key] = value
+        for index in self.indexes.values():
+            index.update(key, old_value, value)
 
     def get(self, key):
         return self.data.get(key, None)
 
     def remove(self, key):
         if key in self.data:
-            del self.data[key]
+            value = self.data.pop(key)
+            for index in self.indexes.values():
+                index.remove(key, value)
+            if self.row_ids is not None:
+                self.row_ids.release(key)
+
+    def find_keys(self, index_name, value):
+        index = self.indexes.get(index_name)
+        if index is None:
+            raise KeyError(f"Index '{index_name}' does not exist.")
+        return index.get_keys(value)
+
+    def find(self, index_name, value):
+        # Записи отдаются по мере обхода, без промежуточного списка
+        keys = self.find_keys(index_name, value)
+        return ((key, self.data[key]) for key in keys)
+
+    # Фильтры по нескольким условиям: битмапы индексов комбинируются
+    # операторами & (AND), | (OR) и - (AND NOT), а NOT x - это all_rows() - x
+    def bitmap(self, index_name, value):
+        index = self.indexes.get(index_name)
+        if not isinstance(index, BitmapIndex):
+            raise KeyError(f"Bitmap index '{index_name}' does not exist.")
+        return index.get_bitmap(value)
+
+    def all_rows(self):
+        if self.row_ids is None:
+            raise KeyError("Collection has no bitmap indexes.")
+        return self.row_ids.live
+
+    def select(self, bitmap):
+        keys = self.row_ids.keys_of(bitmap)
+        return ((key, self.data[key]) for key in keys)
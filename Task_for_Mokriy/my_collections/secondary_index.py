@@ -1,23 +1,137 @@
+from itertools import product
+
+from my_collections.bitmap import Bitmap, RowIds
+
+# secondary_index.py
+# Индекс по полям структурированных значений. index_key - имя поля
+# ("address.city" для вложенных), кортеж полей для составного ключа или
+# None, чтобы индексировать значение целиком. При multi=True поле-список
+# даёт по записи на каждый элемент. Список ключей для значения индекса
+# хранится как dict без значений, а наружу отдаётся его keys() - живое
+# представление только для чтения, без копирования на каждый запрос.
+
+EMPTY_POSTINGS = {}.keys()
+
+
+def extract_field(value, path):
+    for name in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(name)
+        else:
+            value = getattr(value, name, None)
+        if value is None:
+            return None
+    return value
+
+
 class SecondaryIndex:
-    def __init__(self, index_key):
+    def __init__(self, index_key, multi=False):
         self.index_key = index_key
+        self.multi = multi
         self.index = {}
 
+    def extract(self, value):
+        # Все значения индекса, под которыми должна лежать запись
+        if self.index_key is None:
+            parts = [value]
+        elif isinstance(self.index_key, tuple):
+            parts = [extract_field(value, field) for field in self.index_key]
+        else:
+            parts = [extract_field(value, self.index_key)]
+        # Записи без одного из полей в индекс не попадают
+        if any(part is None for part in parts):
+            return set()
+        if self.multi:
+            parts = [part if isinstance(part, (list, tuple, set, frozenset)) else (part,) for part in parts]
+        else:
+            parts = [(part,) for part in parts]
+        if len(parts) == 1:
+            return set(parts[0])
+        return set(product(*parts))
+
+    def _link(self, key, index_values):
+        for index_value in index_values:
+            postings = self.index.get(index_value)
+            if postings is None:
+                postings = self.index[index_value] = {}
+            postings[key] = None
+
+    def _unlink(self, key, index_values):
+        for index_value in index_values:
+            postings = self.index.get(index_value)
+            if postings is not None and key in postings:
+                del postings[key]
+                if not postings:
+                    del self.index[index_value]
+
     def add(self, key, value):
-        if value not in self.index:
-            self.index[value] = set()
-        self.index[value].add(key)
+        self._link(key, self.extract(value))
+
+    def update(self, key, old_value, new_value):
+        # Трогаем только те значения индекса, которые реально поменялись
+        old = self.extract(old_value)
+        new = self.extract(new_value)
+        self._unlink(key, old - new)
+        self._link(key, new - old)
 
     def remove(self, key, value):
-        if value in self.index and key in self.index[value]:
-            self.index[value].remove(key)
-            if len(self.index[value]) == 0:
-                del self.index[value]
+        self._unlink(key, self.extract(value))
+
+    def build(self, items):
+        self.clear()
+        for key, value in items:
+            self.add(key, value)
 
     def get_keys(self, value):
-        return list(self.index.get(value, set()))
+        postings = self.index.get(value)
+        if postings is None:
+            return EMPTY_POSTINGS
+        return postings.keys()
+
+    def count(self, value):
+        return len(self.index.get(value, EMPTY_POSTINGS))
 
     def clear(self):
         self.index = {}
 
 
+class BitmapIndex(SecondaryIndex):
+    # Для полей с малым числом значений (статус, регион): вместо множества
+    # ключей на значение - сжатый битмап номеров строк. Номера выдаёт RowIds
+    # коллекции, общий для всех её битмап-индексов, поэтому битмапы разных
+    # индексов можно пересекать и объединять напрямую
+    def __init__(self, index_key, multi=False, row_ids=None):
+        super().__init__(index_key, multi)
+        self.row_ids = row_ids if row_ids is not None else RowIds()
+
+    def _link(self, key, index_values):
+        row = self.row_ids.assign(key)
+        for index_value in index_values:
+            bitmap = self.index.get(index_value)
+            if bitmap is None:
+                bitmap = self.index[index_value] = Bitmap()
+            bitmap.add(row)
+
+    def _unlink(self, key, index_values):
+        row = self.row_ids.get(key)
+        if row is None:
+            return
+        for index_value in index_values:
+            bitmap = self.index.get(index_value)
+            if bitmap is not None:
+                bitmap.discard(row)
+                if not bitmap:
+                    del self.index[index_value]
+
+    def get_bitmap(self, value):
+        # Живой битмап индекса: его можно комбинировать, но не изменять
+        bitmap = self.index.get(value)
+        if bitmap is None:
+            return Bitmap()
+        return bitmap
+
+    def get_keys(self, value):
+        return self.row_ids.keys_of(self.get_bitmap(value))
+
+    def count(self, value):
+        return len(self.get_bitmap(value))
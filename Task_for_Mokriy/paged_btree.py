@@ -0,0 +1,385 @@
+import mmap
+import os
+import pickle
+import struct
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from associative_container import AssociativeContainer
+
+
+# paged_btree.py
+# B+-дерево на диске: каждый узел занимает одну страницу файла фиксированного
+# размера, файл открыт через mmap, а декодированные узлы живут в LRU-пуле.
+
+DATA_DIR = "data"
+PAGE_SIZE = 4096
+BUFFER_POOL_BYTES = 16 * 1024 * 1024
+MIN_BUFFER_PAGES = 16
+
+MAGIC = b"PBTREE01"
+META = struct.Struct("<8sIQQ")  # magic, page_size, root, page_count
+HEADER = struct.Struct("<I")  # длина закодированного узла
+NO_PAGE = 0  # Страница 0 занята метаданными, поэтому 0 означает "нет ссылки"
+
+
+class PagedNode:
+    def __init__(self, page_id, leaf):
+        self.page_id = page_id
+        self.leaf = leaf
+        self.keys = []
+        self.values = []  # Только в листьях
+        self.children = []  # Номера страниц детей во внутренних узлах
+        self.prev = NO_PAGE
+        self.next = NO_PAGE
+
+    def encode(self):
+        return pickle.dumps((self.leaf, self.keys, self.values, self.children, self.prev, self.next),
+                            protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def decode(cls, page_id, data):
+        leaf, keys, values, children, prev, next_page = pickle.loads(data)
+        node = cls(page_id, leaf)
+        node.keys = keys
+        node.values = values
+        node.children = children
+        node.prev = prev
+        node.next = next_page
+        return node
+
+
+class PageFile:
+    def __init__(self, path, page_size):
+        self.path = path
+        self.page_size = page_size
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self.file.truncate(page_size * 8)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def read(self, page_id):
+        offset = page_id * self.page_size
+        (length,) = HEADER.unpack_from(self.map, offset)
+        start = offset + HEADER.size
+        return self.map[start:start + length]
+
+    def write(self, page_id, data):
+        # Узел больше страницы затёр бы начало следующей
+        if len(data) > self.page_size - HEADER.size:
+            raise ValueError(f"Node of {len(data)} bytes does not fit into page {page_id}.")
+        self.ensure_pages(page_id + 1)
+        offset = page_id * self.page_size
+        HEADER.pack_into(self.map, offset, len(data))
+        start = offset + HEADER.size
+        self.map[start:start + len(data)] = data
+
+    def ensure_pages(self, count):
+        size = count * self.page_size
+        current = len(self.map)
+        if size <= current:
+            return
+        # Файл растёт с удвоением, чтобы не переоткрывать mmap на каждую страницу
+        self.map.close()
+        self.file.truncate(max(size, current * 2))
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def flush(self):
+        self.map.flush()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class BufferPool:
+    def __init__(self, page_file, capacity):
+        self.page_file = page_file
+        self.capacity = max(MIN_BUFFER_PAGES, capacity)
+        self.pages = OrderedDict()
+        self.dirty = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, page_id):
+        node = self.pages.get(page_id)
+        if node is not None:
+            self.hits += 1
+            self.pages.move_to_end(page_id)
+            return node
+        self.misses += 1
+        node = PagedNode.decode(page_id, self.page_file.read(page_id))
+        self.pages[page_id] = node
+        self._evict()
+        return node
+
+    def mark_dirty(self, node):
+        self.pages[node.page_id] = node
+        self.pages.move_to_end(node.page_id)
+        self.dirty.add(node.page_id)
+        self._evict()
+
+    def _evict(self):
+        while len(self.pages) > self.capacity:
+            page_id, node = self.pages.popitem(last=False)
+            if page_id in self.dirty:
+                self.page_file.write(page_id, node.encode())
+                self.dirty.discard(page_id)
+
+    def flush(self):
+        for page_id in sorted(self.dirty):
+            self.page_file.write(page_id, self.pages[page_id].encode())
+        self.dirty.clear()
+
+
+class PagedImage:
+    # Копия файла страниц в снимке. При загрузке файл по тому же пути
+    # заменяется копией целиком (новый inode, открытые mmap не страдают)
+    def __init__(self, path, page_size, buffer_bytes, image):
+        self.path = path
+        self.page_size = page_size
+        self.buffer_bytes = buffer_bytes
+        self.image = image
+
+    def __reduce__(self):
+        return restore_image, (self.path, self.page_size, self.buffer_bytes, self.image)
+
+
+def restore_image(path, page_size, buffer_bytes, image):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(image)
+    os.replace(path + ".tmp", path)
+    return PagedBTree(path, page_size, buffer_bytes)
+
+
+class PagedBTree(AssociativeContainer):
+    def __init__(self, path=None, page_size=PAGE_SIZE, buffer_bytes=BUFFER_POOL_BYTES):
+        super().__init__()
+        if path is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            path = os.path.join(DATA_DIR, f"{uuid.uuid4().hex}.db")
+        self._open(path, page_size, buffer_bytes)
+
+    def _open(self, path, page_size, buffer_bytes):
+        self.path = path
+        self.page_size = page_size
+        self.buffer_bytes = buffer_bytes
+        self.owner_pid = os.getpid()
+        self.page_file = PageFile(path, page_size)
+        self.pool = BufferPool(self.page_file, buffer_bytes // page_size)
+
+        magic, stored_page_size, root, page_count = META.unpack_from(self.page_file.map, 0)
+        if magic == MAGIC:
+            if stored_page_size != page_size:
+                raise ValueError(f"File '{path}' uses page size {stored_page_size}, not {page_size}.")
+            self.root_id = root
+            self.page_count = page_count
+        else:
+            self.page_count = 1
+            root = self._new_node(True)
+            self.root_id = root.page_id
+            self.flush()
+
+    # Объект с открытым файлом не сериализуется, поэтому при сохранении
+    # состояния сбрасываем страницы на диск и запоминаем только путь.
+    # Процесс фонового сохранения в общий mmap не пишет: файл принадлежит родителю
+    def __getstate__(self):
+        if os.getpid() == self.owner_pid:
+            self.flush()
+        return {"path": self.path, "page_size": self.page_size, "buffer_bytes": self.buffer_bytes}
+
+    def __setstate__(self, state):
+        self._open(state["path"], state["page_size"], state["buffer_bytes"])
+
+    def snapshot(self):
+        # Путь к живому файлу - не снимок: пока снимок пишется, страницы
+        # меняются. Поэтому берётся копия страниц на момент вызова
+        self.flush()
+        image = self.page_file.map[:self.page_count * self.page_size]
+        return PagedImage(self.path, self.page_size, self.buffer_bytes, image)
+
+    def flush(self):
+        self.pool.flush()
+        META.pack_into(self.page_file.map, 0, MAGIC, self.page_size, self.root_id, self.page_count)
+        self.page_file.flush()
+
+    def close(self):
+        self.flush()
+        self.page_file.close()
+
+    def destroy(self):
+        # Коллекция удалена: страницы больше не нужны, файл убирается целиком
+        self.page_file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _new_node(self, leaf):
+        node = PagedNode(self.page_count, leaf)
+        self.page_count += 1
+        self.page_file.ensure_pages(self.page_count)
+        self.pool.mark_dirty(node)
+        return node
+
+    def _overflows(self, node):
+        return len(node.encode()) > self.page_size - HEADER.size
+
+    def _find_leaf(self, key):
+        node = self.pool.get(self.root_id)
+        while not node.leaf:
+            node = self.pool.get(node.children[bisect_right(node.keys, key)])
+        return node
+
+    def _edge_leaf(self, side):
+        node = self.pool.get(self.root_id)
+        while not node.leaf:
+            node = self.pool.get(node.children[side])
+        return node
+
+    def get(self, key):
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            return leaf.values[i]
+        return None
+
+    def add(self, key, value):
+        if len(pickle.dumps((key, value))) > self.page_size // 4:
+            raise ValueError("Record is too large for a page.")
+        splits = self._add(self.pool.get(self.root_id), key, value)
+        while splits:
+            root = self._new_node(False)
+            root.keys = [separator for separator, _ in splits]
+            root.children = [self.root_id] + [right.page_id for _, right in splits]
+            self.root_id = root.page_id
+            splits = self._split(root) if self._overflows(root) else None
+
+    def _add(self, node, key, value):
+        if node.leaf:
+            i = bisect_left(node.keys, key)
+            if i < len(node.keys) and node.keys[i] == key:
+                node.values[i] = value
+            else:
+                node.keys.insert(i, key)
+                node.values.insert(i, value)
+        else:
+            i = bisect_right(node.keys, key)
+            splits = self._add(self.pool.get(node.children[i]), key, value)
+            if splits is None:
+                return None
+            node.keys[i:i] = [separator for separator, _ in splits]
+            node.children[i + 1:i + 1] = [right.page_id for _, right in splits]
+
+        self.pool.mark_dirty(node)
+        if self._overflows(node):
+            return self._split(node)
+        return None
+
+    def _split(self, node):
+        # Список (разделитель, новый узел) по возрастанию ключей. При значениях
+        # разного размера половина может снова не влезть - делим её дальше
+        separator, right = self._split_half(node)
+        splits = self._split(node) if self._overflows(node) else []
+        splits.append((separator, right))
+        if self._overflows(right):
+            splits.extend(self._split(right))
+        return splits
+
+    def _split_point(self, node):
+        # Середина по накопленному размеру записей, а не по их числу
+        if node.leaf:
+            sizes = [len(pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL))
+                     for key, value in zip(node.keys, node.values)]
+        else:
+            sizes = [len(pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)) for key in node.keys]
+        half = sum(sizes) / 2
+        total = 0
+        for mid, size in enumerate(sizes):
+            total += size
+            if total >= half:
+                break
+        return max(1, min(mid, len(node.keys) - 1))
+
+    def _split_half(self, node):
+        mid = self._split_point(node)
+        right = self._new_node(node.leaf)
+        if node.leaf:
+            right.keys = node.keys[mid:]
+            right.values = node.values[mid:]
+            node.keys = node.keys[:mid]
+            node.values = node.values[:mid]
+            right.next = node.next
+            right.prev = node.page_id
+            if node.next != NO_PAGE:
+                following = self.pool.get(node.next)
+                following.prev = right.page_id
+                self.pool.mark_dirty(following)
+            node.next = right.page_id
+            separator = right.keys[0]
+        else:
+            separator = node.keys[mid]
+            right.keys = node.keys[mid + 1:]
+            right.children = node.children[mid + 1:]
+            node.keys = node.keys[:mid]
+            node.children = node.children[:mid + 1]
+        self.pool.mark_dirty(node)
+        self.pool.mark_dirty(right)
+        return separator, right
+
+    def update(self, key, value):
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            leaf.values[i] = value
+            self.pool.mark_dirty(leaf)
+            if self._overflows(leaf):
+                # Новое значение не влезло в страницу: вставляем заново со сплитом
+                del leaf.keys[i]
+                del leaf.values[i]
+                self.add(key, value)
+        else:
+            raise KeyError(f"Key '{key}' not found.")
+
+    def delete(self, key):
+        # Удаление ленивое: листья не сливаются, как и в большинстве дисковых
+        # B-деревьев, маршрутизация по разделителям остаётся корректной
+        leaf = self._find_leaf(key)
+        i = bisect_left(leaf.keys, key)
+        if i < len(leaf.keys) and leaf.keys[i] == key:
+            del leaf.keys[i]
+            del leaf.values[i]
+            self.pool.mark_dirty(leaf)
+        else:
+            raise KeyError(f"Key '{key}' not found.")
+
+    def range(self, lo=None, hi=None, reverse=False):
+        if reverse:
+            leaf = self._find_leaf(hi) if hi is not None else self._edge_leaf(-1)
+            i = (bisect_right(leaf.keys, hi) if hi is not None else len(leaf.keys)) - 1
+            while True:
+                while i >= 0:
+                    if lo is not None and leaf.keys[i] < lo:
+                        return
+                    yield leaf.keys[i], leaf.values[i]
+                    i -= 1
+                if leaf.prev == NO_PAGE:
+                    return
+                leaf = self.pool.get(leaf.prev)
+                i = len(leaf.keys) - 1
+        else:
+            leaf = self._find_leaf(lo) if lo is not None else self._edge_leaf(0)
+            i = bisect_left(leaf.keys, lo) if lo is not None else 0
+            while True:
+                while i < len(leaf.keys):
+                    if hi is not None and leaf.keys[i] > hi:
+                        return
+                    yield leaf.keys[i], leaf.values[i]
+                    i += 1
+                if leaf.next == NO_PAGE:
+                    return
+                leaf = self.pool.get(leaf.next)
+                i = 0
@@ -1,9 +1,22 @@
-from datetime import datetime
+import sys
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+
+from wal import OP_ADD, OP_UPDATE, OP_DELETE, OP_BATCH
+
+CHECKPOINT_INTERVAL = 1000
+MAX_CHECKPOINTS = 16  # Больше полных срезов не держим, шаг между ними растёт с историей
+ENTRY_BYTES = 8 * 4 + 1  # Время, три ссылки и код операции одной записи истории
 
 class Command:
     def execute(self):
         raise NotImplementedError
 
+    def entry(self):
+        raise NotImplementedError
+
 class AddCommand(Command):
     def __init__(self, collection, key, value):
         self.collection = collection
@@ -16,6 +29,9 @@ class AddCommand(Command):
     def undo(self):
         del self.collection.data[self.key]
 
+    def entry(self):
+        return OP_ADD, self.key, self.value, None
+
 class UpdateCommand(Command):
     def __init__(self, collection, key, value):
         self.collection = collection
@@ -36,6 +52,9 @@ class UpdateCommand(Command):
         else:
             raise RuntimeError("Cannot undo operation without previous state.")
 
+    def entry(self):
+        return OP_UPDATE, self.key, self.new_value, self.old_value
+
 class DeleteCommand(Command):
     def __init__(self, collection, key):
         self.collection = collection
@@ -55,33 +74,230 @@ class DeleteCommand(Command):
         else:
             raise RuntimeError("Cannot undo operation without previous state.")
 
+    def entry(self):
+        return OP_DELETE, self.key, None, self.deleted_value
+
+def apply_entry(state, op, key, value):
+    if op == OP_BATCH:
+        for sub_op, sub_key, sub_value, _ in value:
+            apply_entry(state, sub_op, sub_key, sub_value)
+    elif op == OP_DELETE:
+        state.pop(key, None)
+    else:
+        state[key] = value
+
+def sub_entries(op, key, value, old_value):
+    # Составная запись транзакции хранит свои операции в поле значения
+    if op == OP_BATCH:
+        return value
+    return ((op, key, value, old_value),)
+
 class PersistenceManager:
-    def __init__(self):
-        self.history = []
+    # История хранится не объектами команд, а параллельными массивами:
+    # код операции, ключ, значение после и значение до. Значения берутся
+    # из пула строк коллекции, так что запись держит ссылку, а не копию.
+    # Всё, что вышло за пределы хранения, сворачивается в базовый образ.
+    def __init__(self, collection=None, checkpoint_interval=CHECKPOINT_INTERVAL,
+                 max_age=None, max_entries=None, max_bytes=None):
+        self.collection = collection
+        self.checkpoint_interval = checkpoint_interval
+        self.set_retention(max_age, max_entries, max_bytes)
+        self._reset({}, None)
+
+    def _reset(self, base, base_time):
+        self.base = base  # Состояние после всех свёрнутых записей
+        self.base_time = base_time  # Время последней свёрнутой записи
+        self.dropped = 0  # Записей физически удалено из массивов
+        self.first = 0  # Номер первой живой записи; до него - базовый образ
+        self.count = 0  # Всего записей за всё время
+        self.bytes = 0  # Оценка памяти живых записей
+
+        self.timestamps = array("d")
+        self.ops = array("B")
+        self.keys = []
+        self.values = []
+        self.old_values = []
+
+        self.checkpoints = []  # (номер записи, состояние после неё)
+        self.checkpoint_positions = []
+        self.key_versions = {}  # ключ -> ([время], [значение после записи])
+
+    def set_retention(self, max_age=None, max_entries=None, max_bytes=None):
+        if isinstance(max_age, timedelta):
+            max_age = max_age.total_seconds()
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def __len__(self):
+        return self.count - self.first
+
+    def _entry_bytes(self, op, key, value, old_value):
+        size = ENTRY_BYTES
+        for _, sub_key, sub_value, sub_old in sub_entries(op, key, value, old_value):
+            size += sys.getsizeof(sub_key) + sys.getsizeof(sub_value) + sys.getsizeof(sub_old)
+        return size
+
+    def _append(self, time, op, key, value, old_value):
+        self.timestamps.append(time)
+        self.ops.append(op)
+        self.keys.append(key)
+        self.values.append(value)
+        self.old_values.append(old_value)
+        self.count += 1
+        self.bytes += self._entry_bytes(op, key, value, old_value)
+        for sub_op, sub_key, sub_value, _ in sub_entries(op, key, value, old_value):
+            times, values = self.key_versions.setdefault(sub_key, ([], []))
+            times.append(time)
+            values.append(None if sub_op == OP_DELETE else sub_value)
+        if self.count % self.checkpoint_interval == 0:
+            self._checkpoint()
+
+    def _checkpoint(self):
+        # Срез - полная копия состояния, поэтому их число ограничено: когда
+        # срезов больше MAX_CHECKPOINTS, шаг удваивается и остаются только
+        # кратные новому шагу. Память под срезы - не больше MAX_CHECKPOINTS
+        # копий при любой длине истории, а их построение на запись амортизируется
+        self.checkpoints.append((self.count, self.get_state_at_position(self.count)))
+        self.checkpoint_positions.append(self.count)
+        if len(self.checkpoints) > MAX_CHECKPOINTS:
+            self.checkpoint_interval *= 2
+            self.checkpoints = [checkpoint for checkpoint in self.checkpoints
+                                if checkpoint[0] % self.checkpoint_interval == 0]
+            self.checkpoint_positions = [position for position, _ in self.checkpoints]
 
     def execute_command(self, command):
         command.execute()
-        self.history.append((datetime.now(), command))
+        self._append(datetime.now().timestamp(), *command.entry())
+        self.enforce_retention()
 
-    def get_state_at(self, timestamp):
-        state = {}
-        for time, command in self.history:
-            if time > timestamp:
-                break
-            if isinstance(command, AddCommand):
-                state[command.key] = command.value
-            elif isinstance(command, UpdateCommand):
-                state[command.key] = command.new_value
-            elif isinstance(command, DeleteCommand):
-                if command.key in state:
-                    del state[command.key]
+    def record_batch(self, commands):
+        # Команды уже применены к коллекции пакетом, остаётся записать их в историю
+        now = datetime.now().timestamp()
+        for command in commands:
+            self._append(now, *command.entry())
+        self.enforce_retention()
+
+    def record_compound(self, entries):
+        # Вся транзакция - одна запись истории с вложенными (op, key, value, old)
+        self._append(datetime.now().timestamp(), OP_BATCH, None, tuple(entries), None)
+        self.enforce_retention()
+
+    def enforce_retention(self, now=None):
+        end = self.first
+        if self.max_entries is not None:
+            end = max(end, self.count - self.max_entries)
+        if self.max_age is not None:
+            if now is None:
+                now = datetime.now().timestamp()
+            end = max(end, bisect_right(self.timestamps, now - self.max_age, self.first - self.dropped) + self.dropped)
+        if self.max_bytes is not None:
+            size = self.bytes
+            while end < self.count and size > self.max_bytes:
+                i = end - self.dropped
+                size -= self._entry_bytes(self.ops[i], self.keys[i], self.values[i], self.old_values[i])
+                end += 1
+        if end > self.first:
+            self.compact(end)
+
+    def compact(self, end):
+        # Записи [first, end) переносятся в базовый образ и больше не хранятся
+        lo, hi = self.first - self.dropped, end - self.dropped
+        compacted = Counter()
+        for i in range(lo, hi):
+            entry = self.ops[i], self.keys[i], self.values[i], self.old_values[i]
+            apply_entry(self.base, *entry[:3])
+            self.bytes -= self._entry_bytes(*entry)
+            for _, key, _, _ in sub_entries(*entry):
+                compacted[key] += 1
+            # Ссылки снимаем сразу, даже если массивы ещё не укорочены
+            self.keys[i] = self.values[i] = self.old_values[i] = None
+        for key, n in compacted.items():
+            times, values = self.key_versions[key]
+            del times[:n]
+            del values[:n]
+            if not times:
+                del self.key_versions[key]
+        self.base_time = self.timestamps[hi - 1]
+        self.first = end
+
+        c = bisect_right(self.checkpoint_positions, end)
+        del self.checkpoints[:c]
+        del self.checkpoint_positions[:c]
+
+        # Голову массивов режем, только когда мёртвых записей не меньше живых,
+        # чтобы сдвиг стоил амортизированно O(1) на запись
+        if hi * 2 >= len(self.keys):
+            del self.timestamps[:hi]
+            del self.ops[:hi]
+            del self.keys[:hi]
+            del self.values[:hi]
+            del self.old_values[:hi]
+            self.dropped = end
+
+    def check_retained(self, timestamp):
+        if self.base_time is not None and timestamp < self.base_time:
+            raise ValueError(f"History before {datetime.fromtimestamp(self.base_time)} has been compacted.")
+
+    def get_state_at_position(self, end):
+        # Ближайший контрольный срез не позже end (или базовый образ) плюс хвост
+        c = bisect_right(self.checkpoint_positions, end)
+        if c:
+            start, checkpoint = self.checkpoints[c - 1]
+            state = dict(checkpoint)
+        else:
+            start, state = self.first, dict(self.base)
+        for i in range(start - self.dropped, end - self.dropped):
+            apply_entry(state, self.ops[i], self.keys[i], self.values[i])
         return state
 
+    def get_state_at(self, timestamp):
+        timestamp = timestamp.timestamp()
+        self.check_retained(timestamp)
+        end = bisect_right(self.timestamps, timestamp, self.first - self.dropped) + self.dropped
+        return self.get_state_at_position(end)
+
+    def get_value_at(self, key, timestamp):
+        timestamp = timestamp.timestamp()
+        self.check_retained(timestamp)
+        versions = self.key_versions.get(key)
+        if versions is not None:
+            times, values = versions
+            i = bisect_right(times, timestamp)
+            if i:
+                return values[i - 1]
+        return self.base.get(key)
+
     def rollback_to(self, timestamp):
-        new_history = []
-        for time, command in self.history:
-            if time <= timestamp:
-                command.undo()
-            else:
-                new_history.append((time, command))
-        self.history = new_history
+        # Бисекцией находим первую запись позже timestamp и отменяем только
+        # хвост, от новых записей к старым: цена пропорциональна числу
+        # отменённых записей, а не длине истории
+        timestamp = timestamp.timestamp()
+        self.check_retained(timestamp)
+        lo = bisect_right(self.timestamps, timestamp, self.first - self.dropped)
+        data = self.collection.data
+        undone = []  # (ключ, восстановленное значение или None)
+        for i in range(self.count - self.dropped - 1, lo - 1, -1):
+            entry = self.ops[i], self.keys[i], self.values[i], self.old_values[i]
+            self.bytes -= self._entry_bytes(*entry)
+            for op, key, _, old_value in reversed(sub_entries(*entry)):
+                if op == OP_ADD:
+                    del data[key]
+                else:
+                    data[key] = old_value
+                undone.append((key, old_value))
+                times, values = self.key_versions[key]
+                times.pop()
+                values.pop()
+                if not times:
+                    del self.key_versions[key]
+        del self.timestamps[lo:]
+        del self.ops[lo:]
+        del self.keys[lo:]
+        del self.values[lo:]
+        del self.old_values[lo:]
+        self.count = lo + self.dropped
+        c = bisect_right(self.checkpoint_positions, self.count)
+        del self.checkpoints[c:]
+        del self.checkpoint_positions[c:]
+        return undone
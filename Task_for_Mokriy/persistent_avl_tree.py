@@ -0,0 +1,124 @@
+from bisect import bisect_right
+from datetime import datetime
+
+from avl_tree import AVLTree, AVLTreeNode
+
+
+# persistent_avl_tree.py
+# Узлы после публикации не меняются: каждая запись копирует только путь
+# от корня до изменённого узла, остальные поддеревья общие у всех версий.
+# Снимок или историческая версия - это просто сохранённый указатель на корень.
+
+class PersistentAVLTree(AVLTree):
+    def __init__(self, keep_versions=0):
+        super().__init__()
+        self.keep_versions = keep_versions
+        self.versions = []  # (время, корень) последних keep_versions записей
+
+    def snapshot(self):
+        # Читатели обходят снимок без блокировок, пока писатель создаёт новые версии
+        frozen = PersistentAVLTree(self.keep_versions)
+        frozen.root = self.root
+        return frozen
+
+    def version_at(self, timestamp):
+        times = [time for time, _ in self.versions]
+        i = bisect_right(times, timestamp)
+        if i == 0:
+            raise KeyError(f"No version at or before {timestamp}.")
+        frozen = PersistentAVLTree()
+        frozen.root = self.versions[i - 1][1]
+        return frozen
+
+    def _record_version(self):
+        if self.keep_versions:
+            self.versions.append((datetime.now(), self.root))
+            if len(self.versions) > self.keep_versions:
+                del self.versions[0]
+
+    def add(self, key, value):
+        super().add(key, value)
+        self._record_version()
+
+    def update(self, key, value):
+        super().update(key, value)
+        self._record_version()
+
+    def delete(self, key):
+        super().delete(key)
+        self._record_version()
+
+    def add_many(self, items):
+        super().add_many(items)
+        self._record_version()
+
+    def delete_many(self, keys):
+        super().delete_many(keys)
+        self._record_version()
+
+    def _node(self, key, value, left, right):
+        node = AVLTreeNode(key, value)
+        node.left = left
+        node.right = right
+        node.height = 1 + max(self._get_height(left), self._get_height(right))
+        node.size = 1 + self._get_size(left) + self._get_size(right)
+        return node
+
+    def _balanced(self, key, value, left, right):
+        # Новый узел с готовыми поддеревьями; повороты тоже строят копии
+        if self._get_height(left) > self._get_height(right) + 1:
+            if self._get_height(left.left) >= self._get_height(left.right):
+                return self._node(left.key, left.value, left.left,
+                                  self._node(key, value, left.right, right))
+            pivot = left.right
+            return self._node(pivot.key, pivot.value,
+                              self._node(left.key, left.value, left.left, pivot.left),
+                              self._node(key, value, pivot.right, right))
+        if self._get_height(right) > self._get_height(left) + 1:
+            if self._get_height(right.right) >= self._get_height(right.left):
+                return self._node(right.key, right.value,
+                                  self._node(key, value, left, right.left), right.right)
+            pivot = right.left
+            return self._node(pivot.key, pivot.value,
+                              self._node(key, value, left, pivot.left),
+                              self._node(right.key, right.value, pivot.right, right.right))
+        return self._node(key, value, left, right)
+
+    def _add(self, node, key, value):
+        if node is None:
+            return AVLTreeNode(key, value)
+        if key < node.key:
+            return self._balanced(node.key, node.value, self._add(node.left, key, value), node.right)
+        if key > node.key:
+            return self._balanced(node.key, node.value, node.left, self._add(node.right, key, value))
+        return self._node(key, value, node.left, node.right)
+
+    def _update(self, node, key, value):
+        if node is None:
+            raise KeyError(f"Key '{key}' not found.")
+        if key < node.key:
+            return self._node(node.key, node.value, self._update(node.left, key, value), node.right)
+        if key > node.key:
+            return self._node(node.key, node.value, node.left, self._update(node.right, key, value))
+        return self._node(key, value, node.left, node.right)
+
+    def _delete(self, node, key):
+        if node is None:
+            return None
+        if key < node.key:
+            left = self._delete(node.left, key)
+            if left is node.left:
+                return node
+            return self._balanced(node.key, node.value, left, node.right)
+        if key > node.key:
+            right = self._delete(node.right, key)
+            if right is node.right:
+                return node
+            return self._balanced(node.key, node.value, node.left, right)
+        if node.left is None:
+            return node.right
+        if node.right is None:
+            return node.left
+        successor = self._find_min(node.right)
+        return self._balanced(successor.key, successor.value, node.left,
+                              self._delete(node.right, successor.key))
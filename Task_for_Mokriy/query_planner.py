@@ -0,0 +1,270 @@
+import math
+from bisect import bisect_left, bisect_right
+
+from hash_container import HashContainer
+from index import FullTextIndex, OrderedIndex, QUERY_CLAUSE, tokenize
+
+
+# query_planner.py
+# Маленький планировщик поверх DataCollection и IndexManager. Условие
+# задаётся по ключу записи, по значению или по индексу коллекции; индекс
+# хранит пары (ключ индекса, ключ записи). Для каждого условия, которое
+# может вести поиск, оценивается стоимость пути доступа по статистике
+# (число строк и гистограмма равной глубины), выбирается самый дешёвый,
+# остальные условия проверяются на найденных записях.
+
+HISTOGRAM_BUCKETS = 100
+ANALYZE_THRESHOLD = 0.2  # Доля изменений, после которой статистика пересобирается
+OPERATORS = ("=", "between", ">=", "<=", "match")
+
+
+class Predicate:
+    def __init__(self, field, op, *args):
+        if op not in OPERATORS:
+            raise ValueError(f"Unsupported operator '{op}'.")
+        if op == "match" and field in ("key", "value"):
+            raise ValueError("MATCH needs a text index.")
+        self.field = field  # "key", "value" или имя индекса
+        self.op = op
+        self.args = args
+        self.keys = None  # Ключи записей по индексу, если условие проверяется на месте
+        self.probe_cost = 0  # Цена получить эти ключи из индекса
+
+    def bounds(self):
+        if self.op == "=":
+            return self.args[0], self.args[0]
+        if self.op == "between":
+            return self.args[0], self.args[1]
+        if self.op == ">=":
+            return self.args[0], None
+        return None, self.args[0]
+
+    def matches(self, planner, key, value):
+        if self.field not in ("key", "value"):
+            if self.keys is None:
+                self.keys = set(planner.index_keys(self))
+            return key in self.keys
+        target = key if self.field == "key" else value
+        lo, hi = self.bounds()
+        return (lo is None or target >= lo) and (hi is None or target <= hi)
+
+    def __repr__(self):
+        return f"{self.field} {self.op} {' '.join(str(arg) for arg in self.args)}"
+
+
+def parse_predicates(parts):
+    # поле оператор аргументы [and поле оператор аргументы ...],
+    # between принимает две границы: key between a b
+    clauses = [[]]
+    for part in parts:
+        if part.lower() == "and":
+            clauses.append([])
+        else:
+            clauses[-1].append(part)
+    predicates = []
+    for clause in clauses:
+        if len(clause) < 3:
+            raise ValueError(f"Incomplete condition '{' '.join(clause)}'.")
+        field, op, args = clause[0], clause[1].lower(), clause[2:]
+        if op == "match":
+            args = [" ".join(args)]
+        elif len(args) != (2 if op == "between" else 1):
+            raise ValueError(f"Wrong number of arguments in '{' '.join(clause)}'.")
+        predicates.append(Predicate(field, op, *args))
+    return predicates
+
+
+class ColumnStatistics:
+    # Гистограмма равной глубины: в каждой корзине одинаковое число строк,
+    # границы корзин - отсортированные ключи через равный шаг
+    def __init__(self, keys, changes):
+        keys = sorted(keys)
+        self.rows = len(keys)
+        self.distinct = sum(1 for i in range(self.rows) if i == 0 or keys[i] != keys[i - 1])
+        self.changes = changes  # Счётчик изменений источника на момент сбора
+        step = max(1, self.rows / HISTOGRAM_BUCKETS)
+        self.bounds = [keys[int(i * step)] for i in range(math.ceil(self.rows / step))]
+        if keys:
+            self.bounds.append(keys[-1])
+        self.depth = self.rows / max(1, len(self.bounds) - 1)
+
+    def estimate_equal(self):
+        return self.rows / self.distinct if self.distinct else 0
+
+    def estimate_range(self, lo, hi):
+        if not self.rows:
+            return 0
+        buckets = len(self.bounds) - 1
+        first = 0 if lo is None else bisect_left(self.bounds, lo)
+        last = len(self.bounds) if hi is None else bisect_right(self.bounds, hi)
+        if first >= len(self.bounds) or last == 0:
+            return 0
+        # Корзины целиком между границами плюс по половине крайних
+        estimate = max(0, last - first - 1) * self.depth
+        if 0 < first <= buckets:
+            estimate += self.depth / 2
+        if last <= buckets:
+            estimate += self.depth / 2
+        return min(self.rows, max(1, estimate))
+
+
+class Plan:
+    def __init__(self, access, predicate, rows, cost):
+        self.access = access
+        self.predicate = predicate  # Условие, по которому идёт доступ
+        self.rows = rows
+        self.cost = cost
+        self.residual = []
+
+    def describe(self):
+        text = self.access if self.predicate is None else f"{self.access} on {self.predicate!r}"
+        text += f" (rows ~{self.rows:.0f}, cost {self.cost:.1f})"
+        if self.residual:
+            text += " filter: " + " and ".join(repr(predicate) for predicate in self.residual)
+        return text
+
+
+class QueryPlanner:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def _index(self, name):
+        index = self.collection.index_manager.get_index(name)
+        if index is None:
+            raise KeyError(f"Index '{name}' does not exist.")
+        return index
+
+    def statistics(self, name):
+        collection = self.collection
+        if collection.statistics is None:
+            collection.statistics = {}
+        if name == "key":
+            keys, changes = collection.data.keys(), collection.changes
+        else:
+            index = self._index(name)
+            keys, changes = index.index.keys(), index.changes
+        stats = collection.statistics.get(name)
+        if stats is None or changes - stats.changes > ANALYZE_THRESHOLD * max(stats.rows, 1):
+            stats = collection.statistics[name] = ColumnStatistics(keys, changes)
+        return stats
+
+    def analyze(self):
+        self.collection.statistics = {}
+        self.statistics("key")
+        for name, index in self.collection.index_manager.indices.items():
+            if not isinstance(index, FullTextIndex):
+                self.statistics(name)
+
+    def _text_rows(self, index, query):
+        # Размеры списков словопозиций известны точно, по AND берём меньший
+        rows = None
+        for phrase, word in QUERY_CLAUSE.findall(query):
+            if word.endswith("*"):
+                prefix = word[:-1].lower()
+                count = 0
+                for term, posting in index.postings.range(prefix):
+                    if not term.startswith(prefix):
+                        break
+                    count += len(posting)
+            else:
+                postings = [index.postings.get(term) for term in tokenize(phrase or word)]
+                count = min((len(posting) if posting is not None else 0 for posting in postings), default=0)
+            rows = count if rows is None else min(rows, count)
+        return rows or 0
+
+    def candidates(self, predicates):
+        collection = self.collection
+        data = collection.data
+        # Хеш без построенного дерева отвечает на диапазон только сортировкой всех ключей
+        ordered = not (isinstance(data, dict) or isinstance(data, HashContainer) and not getattr(data, "promoted", False))
+        rows = self.statistics("key").rows
+        descent = math.log2(rows + 1)
+        fetch = descent if ordered else 1  # Цена чтения одной записи по ключу
+
+        plans = [Plan("full scan", None, rows, rows)]
+        for predicate in predicates:
+            if predicate.field == "value":
+                continue
+            if predicate.field == "key":
+                if predicate.op == "=":
+                    plans.append(Plan("key lookup", predicate, 1, fetch))
+                elif ordered:
+                    estimate = self.statistics("key").estimate_range(*predicate.bounds())
+                    plans.append(Plan("key range scan", predicate, estimate, descent + estimate))
+                continue
+            index = self._index(predicate.field)
+            if isinstance(index, FullTextIndex):
+                if predicate.op != "match":
+                    raise ValueError(f"Index '{predicate.field}' only supports MATCH.")
+                estimate = self._text_rows(index, predicate.args[0])
+                predicate.probe_cost = estimate
+                plans.append(Plan("text search", predicate, estimate, estimate * (1 + fetch)))
+                continue
+            if predicate.op == "match":
+                raise ValueError(f"Index '{predicate.field}' is not a text index.")
+            stats = self.statistics(predicate.field)
+            if predicate.op == "=":
+                estimate = stats.estimate_equal()
+                probe = math.log2(stats.rows + 1) if isinstance(index, OrderedIndex) else 1
+                predicate.probe_cost = probe
+                plans.append(Plan("index lookup", predicate, estimate, probe + estimate * fetch))
+            else:
+                estimate = stats.estimate_range(*predicate.bounds())
+                if isinstance(index, OrderedIndex):
+                    probe = math.log2(stats.rows + 1) + estimate
+                else:
+                    probe = stats.rows  # Хеш-индекс отвечает на диапазон только полным проходом
+                predicate.probe_cost = probe
+                plans.append(Plan("index range scan", predicate, estimate, probe + estimate * fetch))
+        return plans
+
+    def plan(self, predicates):
+        plans = self.candidates(predicates)
+        for plan in plans:
+            plan.residual = [predicate for predicate in predicates if predicate is not plan.predicate]
+            # Условие по индексу, проверяемое на месте, всё равно читает индекс
+            plan.cost += sum(predicate.probe_cost for predicate in plan.residual)
+        best = min(plans, key=lambda plan: plan.cost)
+        return best, plans
+
+    def index_keys(self, predicate):
+        index = self._index(predicate.field)
+        if isinstance(index, FullTextIndex):
+            return index.search(predicate.args[0])
+        if predicate.op == "=":
+            key = index.search(predicate.args[0])
+            return [] if key is None else [key]
+        lo, hi = predicate.bounds()
+        if isinstance(index, OrderedIndex):
+            pairs = index.search_range(lo, hi)
+        else:
+            pairs = ((k, v) for k, v in index.index.items() if (lo is None or k >= lo) and (hi is None or k <= hi))
+        return (key for _, key in pairs)
+
+    def _access(self, plan):
+        collection = self.collection
+        predicate = plan.predicate
+        if plan.access == "full scan":
+            return collection.data.items()
+        if plan.access == "key lookup":
+            value = collection.get(predicate.args[0])
+            return [] if value is None else [(predicate.args[0], value)]
+        if plan.access == "key range scan":
+            return collection.data.range(*predicate.bounds())
+        return self._fetch(self.index_keys(predicate))
+
+    def _fetch(self, keys):
+        # Несколько ключей индекса могут вести к одной записи
+        seen = set()
+        for key in keys:
+            if key in seen:
+                continue
+            seen.add(key)
+            value = self.collection.get(key)
+            if value is not None:
+                yield key, value
+
+    def execute(self, plan):
+        for key, value in self._access(plan):
+            if all(predicate.matches(self, key, value) for predicate in plan.residual):
+                yield key, value
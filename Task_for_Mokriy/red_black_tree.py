@@ -1,4 +1,6 @@
-from associative_container import AssociativeContainer
+from bisect import bisect_left
+
+from associative_container import AssociativeContainer, sorted_batch
 
 
 # red_black_tree.py
@@ -11,12 +13,15 @@ class RedBlackTreeNode:
         self.left = None
         self.right = None
         self.parent = None
+        self.size = 1  # Число узлов в поддереве
 
 
 class RedBlackTree(AssociativeContainer):
     def __init__(self):
         super().__init__()
         self.NIL_LEAF = RedBlackTreeNode(None, None)
+        self.NIL_LEAF.color = "BLACK"
+        self.NIL_LEAF.size = 0
         self.root = self.NIL_LEAF
 
     def add(self, key, value):
@@ -29,6 +34,7 @@ class RedBlackTree(AssociativeContainer):
 
         while current != self.NIL_LEAF:
             parent = current
+            current.size += 1
             if new_node.key < current.key:
                 current = current.left
             else:
@@ -61,6 +67,129 @@ class RedBlackTree(AssociativeContainer):
             return None
         return node.value
 
+    def range(self, lo=None, hi=None, reverse=False):
+        stack = []
+        self._descend_to_bound(self.root, stack, lo, hi, reverse)
+        while stack:
+            node = stack.pop()
+            if reverse:
+                if lo is not None and node.key < lo:
+                    return
+                next_node = node.left
+            else:
+                if hi is not None and node.key > hi:
+                    return
+                next_node = node.right
+            yield node.key, node.value
+            self._descend_to_bound(next_node, stack, lo, hi, reverse)
+
+    def _descend_to_bound(self, node, stack, lo, hi, reverse):
+        while node != self.NIL_LEAF:
+            if reverse:
+                if hi is not None and node.key > hi:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            else:
+                if lo is not None and node.key < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+
+    def rank(self, key):
+        return self._count_less(key, False)
+
+    def count_range(self, lo, hi):
+        if lo is not None and hi is not None and lo > hi:
+            return 0
+        upper = self.root.size if hi is None else self._count_less(hi, True)
+        lower = 0 if lo is None else self._count_less(lo, False)
+        return upper - lower
+
+    def _count_less(self, key, inclusive):
+        count = 0
+        node = self.root
+        while node != self.NIL_LEAF:
+            if key < node.key or (key == node.key and not inclusive):
+                node = node.left
+            else:
+                count += node.left.size + 1
+                node = node.right
+        return count
+
+    def select(self, index):
+        if index < 0 or index >= self.root.size:
+            raise IndexError("Index out of range.")
+        node = self.root
+        while True:
+            if index < node.left.size:
+                node = node.left
+            elif index == node.left.size:
+                return node.key, node.value
+            else:
+                index -= node.left.size + 1
+                node = node.right
+
+    def get_many(self, keys):
+        batch = sorted(set(keys))
+        found = {}
+        self._get_many(self.root, batch, 0, len(batch), found)
+        return {key: found.get(key) for key in keys}
+
+    def _get_many(self, node, batch, lo, hi, found):
+        if node == self.NIL_LEAF or lo >= hi:
+            return
+        mid = bisect_left(batch, node.key, lo, hi)
+        self._get_many(node.left, batch, lo, mid, found)
+        if mid < hi and batch[mid] == node.key:
+            found[node.key] = node.value
+            mid += 1
+        self._get_many(node.right, batch, mid, hi, found)
+
+    def add_many(self, items):
+        batch = sorted_batch(items)
+        if len(batch) * 4 >= self.root.size:
+            self._rebuild(self._merged_items(batch))
+        else:
+            for key, value in batch:
+                node = self._get_node(key)
+                if node:
+                    node.value = value
+                else:
+                    self.add(key, value)
+
+    def delete_many(self, keys):
+        batch = set(keys)
+        if len(batch) * 4 >= self.root.size:
+            self._rebuild([item for item in self.range() if item[0] not in batch])
+        else:
+            for key in sorted(batch):
+                node = self._get_node(key)
+                if node:
+                    self._delete_node(node)
+
+    def _rebuild(self, items):
+        # Сбалансированное дерево из отсортированных пар: все узлы чёрные,
+        # кроме неполного нижнего уровня, который красится в красный
+        n = len(items)
+        red_depth = n.bit_length() - 1 if n & (n + 1) else -1
+        self.root = self._build(items, 0, n, 0, red_depth, None)
+        self.root.color = "BLACK"
+
+    def _build(self, items, lo, hi, depth, red_depth, parent):
+        if lo >= hi:
+            return self.NIL_LEAF
+        mid = (lo + hi) // 2
+        node = RedBlackTreeNode(*items[mid])
+        node.color = "RED" if depth == red_depth else "BLACK"
+        node.parent = parent
+        node.left = self._build(items, lo, mid, depth + 1, red_depth, node)
+        node.right = self._build(items, mid + 1, hi, depth + 1, red_depth, node)
+        node.size = hi - lo
+        return node
+
     def update(self, key, value):
         node = self._get_node(key)
         if node:
@@ -87,6 +216,15 @@ class RedBlackTree(AssociativeContainer):
         return current
 
     def _delete_node(self, node):
+        # Узел, который физически уходит из дерева: сам node или его преемник
+        removed = node
+        if node.left != self.NIL_LEAF and node.right != self.NIL_LEAF:
+            removed = self._find_min(node.right)
+        current = removed.parent
+        while current is not None:
+            current.size -= 1
+            current = current.parent
+
         y = node
         y_original_color = y.color
         if node.left == self.NIL_LEAF:
@@ -109,6 +247,7 @@ class RedBlackTree(AssociativeContainer):
             y.left = node.left
             y.left.parent = y
             y.color = node.color
+            y.size = node.size
         if y_original_color == "BLACK":
             self._fix_delete(x)
 
@@ -183,6 +322,8 @@ class RedBlackTree(AssociativeContainer):
 
         y.left = z
         z.parent = y
+        y.size = z.size
+        z.size = 1 + z.left.size + z.right.size
 
     def _rotate_right(self, z):
         y = z.left
@@ -200,6 +341,8 @@ class RedBlackTree(AssociativeContainer):
 
         y.right = z
         z.parent = y
+        y.size = z.size
+        z.size = 1 + z.left.size + z.right.size
 
     def _find_min(self, node):
         current = node
@@ -209,7 +352,7 @@ class RedBlackTree(AssociativeContainer):
 
 
     def _fix_insert(self, new_node):
-        while new_node.parent.color == "RED":
+        while new_node != self.root and new_node.parent.color == "RED":
             if new_node.parent == new_node.parent.parent.left:
                 uncle = new_node.parent.parent.right
                 if uncle.color == "RED":
@@ -2,15 +2,19 @@ from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.responses import FileResponse
 from commands import CommandProcessor
 from data_storage import DataStorageSystem
-from models import PoolRequest, SchemaRequest, CollectionRequest, RecordRequest
+from models import PoolRequest, SchemaRequest, CollectionRequest, RecordRequest, MultiRecordRequest, MultiGetRequest, BatchRequest, SnapshotRequest, IndexRequest, SearchRequest
 from auth import get_current_active_user, User
 from users import router as user_router
 import logging
+import os
 import uuid
 
 app = FastAPI()
 
-command_processor = CommandProcessor(DataStorageSystem())
+data_storage_system = DataStorageSystem()
+data_storage_system.enable_wal(os.environ.get("WAL_DIR", "wal"), os.environ.get("WAL_DURABILITY", "interval"))
+command_processor = CommandProcessor(data_storage_system)
+command_processor.state_manager.recover()
 
 app.include_router(user_router)
 
@@ -116,6 +120,88 @@ async def get_record_btree(pool_name: str, key: str, current_user: User = Depend
     logging.info(f"Record retrieved from B-Tree collection in pool {pool_name} by {current_user.username}")
     return {"message": f"Record from B-Tree collection in pool {pool_name} retrieved."}
 
+@app.post("/multi_add/")
+async def multi_add(request: MultiRecordRequest, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor", "user"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        added = command_processor.add_records(request.pool_name, request.schema_name, request.collection_name, list(request.records.items()))
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not added:
+        raise HTTPException(status_code=404, detail="Collection does not exist")
+    logging.info(f"{len(request.records)} records added to collection {request.collection_name} in pool {request.pool_name} by {current_user.username}")
+    return {"message": f"{len(request.records)} records added to collection {request.collection_name}."}
+
+@app.post("/multi_get/")
+async def multi_get(request: MultiGetRequest, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor", "user"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    records = command_processor.get_records(request.pool_name, request.schema_name, request.collection_name, request.keys)
+    if records is None:
+        raise HTTPException(status_code=404, detail="Collection does not exist")
+    logging.info(f"{len(request.keys)} records retrieved from collection {request.collection_name} in pool {request.pool_name} by {current_user.username}")
+    return {"records": records}
+
+@app.post("/create_index/")
+async def create_index(request: IndexRequest, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    command_processor.process_command(f"CREATE_INDEX {request.pool_name} {request.schema_name} {request.collection_name} {request.index_name} {request.kind}")
+    logging.info(f"Index {request.index_name} created on collection {request.collection_name} in pool {request.pool_name} by {current_user.username}")
+    return {"message": f"Index {request.index_name} created on collection {request.collection_name}."}
+
+@app.post("/search/")
+async def search(request: SearchRequest, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor", "user"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        records = command_processor.search_records(request.pool_name, request.schema_name, request.collection_name, request.index_name, request.query)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if records is None:
+        raise HTTPException(status_code=404, detail="Collection does not exist")
+    logging.info(f"{len(records)} records found in collection {request.collection_name} in pool {request.pool_name} by {current_user.username}")
+    return {"records": records}
+
+@app.get("/bloom_stats/")
+async def bloom_stats(pool_name: str, schema_name: str, collection_name: str, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    stats = command_processor.get_bloom_stats(pool_name, schema_name, collection_name)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Collection does not exist")
+    return stats
+
+@app.post("/batch/")
+async def batch(request: BatchRequest, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    operations = [(op.op, op.pool_name, op.schema_name, op.collection_name, op.key, op.value) for op in request.operations]
+    try:
+        count = command_processor.apply_batch(operations)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logging.info(f"Batch of {count} operations committed by {current_user.username}")
+    return {"message": f"Batch of {count} operations committed."}
+
+@app.post("/bgsave/")
+async def bgsave(request: SnapshotRequest, current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        command_processor.state_manager.bgsave(request.filename)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logging.info(f"Background save to {request.filename} started by {current_user.username}")
+    return {"message": f"Background saving to {request.filename} started."}
+
+@app.get("/lastsave/")
+async def lastsave(current_user: User = Depends(get_current_active_user)):
+    if current_user.role not in ["administrator", "editor"]:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return command_processor.state_manager.save_info()
+
 @app.get("/")
 async def read_index():
     return FileResponse("static/index.html")
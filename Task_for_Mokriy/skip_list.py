@@ -0,0 +1,196 @@
+import random
+import threading
+import time
+
+from associative_container import AssociativeContainer
+
+
+# skip_list.py
+# Ленивый skip list (Herlihy, Shavit): читатели идут по ссылкам без блокировок,
+# писатель блокирует только предшественников затронутого узла и после
+# блокировки проверяет, что они не изменились (оптимистичная валидация).
+
+MAX_LEVEL = 32
+
+
+class SkipListNode:
+    def __init__(self, key, value, top_level):
+        self.key = key
+        self.value = value
+        self.next = [None] * (top_level + 1)
+        self.top_level = top_level
+        self.lock = threading.Lock()
+        self.marked = False  # Логически удалён
+        self.fully_linked = False  # Вставлен на всех своих уровнях
+
+
+class SkipList(AssociativeContainer):
+    def __init__(self):
+        super().__init__()
+        self._init_sentinels()
+
+    def _init_sentinels(self):
+        self.head = SkipListNode(None, None, MAX_LEVEL - 1)
+        self.tail = SkipListNode(None, None, MAX_LEVEL - 1)
+        for level in range(MAX_LEVEL):
+            self.head.next[level] = self.tail
+        self.head.fully_linked = True
+        self.tail.fully_linked = True
+
+    # Блокировки не сериализуются, поэтому сохраняем только пары
+    def __getstate__(self):
+        return {"items": list(self.range())}
+
+    def __setstate__(self, state):
+        self._init_sentinels()
+        for key, value in state["items"]:
+            self.add(key, value)
+
+    def _random_level(self):
+        level = 0
+        while level < MAX_LEVEL - 1 and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find(self, key, preds, succs):
+        found = -1
+        pred = self.head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            curr = pred.next[level]
+            while curr is not self.tail and curr.key < key:
+                pred = curr
+                curr = pred.next[level]
+            if found == -1 and curr is not self.tail and curr.key == key:
+                found = level
+            preds[level] = pred
+            succs[level] = curr
+        return found
+
+    def _lock_preds(self, preds, top_level, check):
+        # Блокируем предшественников снизу вверх и проверяем, что связи не поменялись
+        locked = []
+        prev = None
+        for level in range(top_level + 1):
+            pred = preds[level]
+            if pred is not prev:
+                pred.lock.acquire()
+                locked.append(pred)
+                prev = pred
+            if pred.marked or not check(level, pred):
+                return locked, False
+        return locked, True
+
+    def get(self, key):
+        node = self.head
+        for level in range(MAX_LEVEL - 1, -1, -1):
+            curr = node.next[level]
+            while curr is not self.tail and curr.key < key:
+                node = curr
+                curr = node.next[level]
+            if curr is not self.tail and curr.key == key:
+                if curr.fully_linked and not curr.marked:
+                    return curr.value
+                return None
+        return None
+
+    def add(self, key, value):
+        preds = [None] * MAX_LEVEL
+        succs = [None] * MAX_LEVEL
+        top_level = self._random_level()
+        while True:
+            found = self._find(key, preds, succs)
+            if found != -1:
+                node = succs[found]
+                if not node.marked:
+                    while not node.fully_linked:
+                        time.sleep(0)
+                    with node.lock:
+                        if not node.marked:
+                            node.value = value
+                            return
+                continue
+
+            locked, valid = self._lock_preds(
+                preds, top_level,
+                lambda level, pred: not succs[level].marked and pred.next[level] is succs[level])
+            try:
+                if not valid:
+                    continue
+                node = SkipListNode(key, value, top_level)
+                for level in range(top_level + 1):
+                    node.next[level] = succs[level]
+                for level in range(top_level + 1):
+                    preds[level].next[level] = node
+                node.fully_linked = True
+                return
+            finally:
+                for pred in locked:
+                    pred.lock.release()
+
+    def update(self, key, value):
+        preds = [None] * MAX_LEVEL
+        succs = [None] * MAX_LEVEL
+        found = self._find(key, preds, succs)
+        if found != -1:
+            node = succs[found]
+            with node.lock:
+                if node.fully_linked and not node.marked:
+                    node.value = value
+                    return
+        raise KeyError(f"Key '{key}' not found.")
+
+    def delete(self, key):
+        preds = [None] * MAX_LEVEL
+        succs = [None] * MAX_LEVEL
+        victim = None
+        while True:
+            found = self._find(key, preds, succs)
+            if victim is None:
+                if found == -1:
+                    raise KeyError(f"Key '{key}' not found.")
+                candidate = succs[found]
+                if not (candidate.fully_linked and candidate.top_level == found and not candidate.marked):
+                    raise KeyError(f"Key '{key}' not found.")
+                candidate.lock.acquire()
+                if candidate.marked:
+                    candidate.lock.release()
+                    raise KeyError(f"Key '{key}' not found.")
+                # Логическое удаление: с этого момента читатели узел не видят
+                candidate.marked = True
+                victim = candidate
+
+            locked, valid = self._lock_preds(
+                preds, victim.top_level,
+                lambda level, pred: pred.next[level] is victim)
+            try:
+                if not valid:
+                    continue
+                for level in range(victim.top_level, -1, -1):
+                    preds[level].next[level] = victim.next[level]
+                victim.lock.release()
+                return
+            finally:
+                for pred in locked:
+                    pred.lock.release()
+
+    def range(self, lo=None, hi=None, reverse=False):
+        if reverse:
+            # Ссылки односторонние: собираем диапазон вперёд и отдаём с конца
+            return reversed(list(self.range(lo, hi)))
+        return self._range(lo, hi)
+
+    def _range(self, lo, hi):
+        node = self.head
+        if lo is not None:
+            for level in range(MAX_LEVEL - 1, -1, -1):
+                curr = node.next[level]
+                while curr is not self.tail and curr.key < lo:
+                    node = curr
+                    curr = node.next[level]
+        node = node.next[0]
+        while node is not self.tail:
+            if hi is not None and node.key > hi:
+                return
+            if node.fully_linked and not node.marked:
+                yield node.key, node.value
+            node = node.next[0]
@@ -0,0 +1,167 @@
+from bisect import bisect_left, bisect_right
+
+from associative_container import AssociativeContainer, sorted_batch
+
+
+# sorted_list.py
+# Ключи и значения лежат в отсортированных списках-чанках, поиск идёт через
+# bisect по максимумам чанков и внутри чанка, без отдельного объекта на ключ.
+
+CHUNK_SIZE = 512
+
+
+class SortedListContainer(AssociativeContainer):
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        self.chunk_size = chunk_size
+        self.key_chunks = []
+        self.value_chunks = []
+        self.maxes = []  # Последний ключ каждого чанка
+        self.length = 0
+
+    def _locate(self, key):
+        # Чанк, в котором ключ лежит или должен лежать, и позиция в нём
+        c = bisect_left(self.maxes, key)
+        if c == len(self.maxes):
+            return c, 0
+        return c, bisect_left(self.key_chunks[c], key)
+
+    def get(self, key):
+        c, i = self._locate(key)
+        if c < len(self.maxes) and self.key_chunks[c][i] == key:
+            return self.value_chunks[c][i]
+        return None
+
+    def add(self, key, value):
+        if not self.maxes:
+            self.key_chunks.append([key])
+            self.value_chunks.append([value])
+            self.maxes.append(key)
+            self.length = 1
+            return
+        c, i = self._locate(key)
+        if c == len(self.maxes):
+            # Ключ больше всех: дописываем в конец последнего чанка
+            c -= 1
+            i = len(self.key_chunks[c])
+            self.maxes[c] = key
+        elif self.key_chunks[c][i] == key:
+            self.value_chunks[c][i] = value
+            return
+        self.key_chunks[c].insert(i, key)
+        self.value_chunks[c].insert(i, value)
+        self.length += 1
+        if len(self.key_chunks[c]) > 2 * self.chunk_size:
+            self._split(c)
+
+    def _split(self, c):
+        keys = self.key_chunks[c]
+        values = self.value_chunks[c]
+        half = len(keys) // 2
+        self.key_chunks[c:c + 1] = [keys[:half], keys[half:]]
+        self.value_chunks[c:c + 1] = [values[:half], values[half:]]
+        self.maxes[c:c + 1] = [keys[half - 1], keys[-1]]
+
+    def update(self, key, value):
+        c, i = self._locate(key)
+        if c < len(self.maxes) and self.key_chunks[c][i] == key:
+            self.value_chunks[c][i] = value
+        else:
+            raise KeyError(f"Key '{key}' not found.")
+
+    def delete(self, key):
+        c, i = self._locate(key)
+        if c == len(self.maxes) or self.key_chunks[c][i] != key:
+            raise KeyError(f"Key '{key}' not found.")
+        keys = self.key_chunks[c]
+        del keys[i]
+        del self.value_chunks[c][i]
+        self.length -= 1
+        if not keys:
+            del self.key_chunks[c]
+            del self.value_chunks[c]
+            del self.maxes[c]
+        else:
+            self.maxes[c] = keys[-1]
+
+    def add_many(self, items):
+        batch = sorted_batch(items)
+        if len(batch) * 4 >= self.length:
+            self._rebuild(self._merged_items(batch))
+        else:
+            for key, value in batch:
+                self.add(key, value)
+
+    def delete_many(self, keys):
+        batch = set(keys)
+        if len(batch) * 4 >= self.length:
+            self._rebuild([item for item in self.range() if item[0] not in batch])
+        else:
+            for key in sorted(batch):
+                if key in self:
+                    self.delete(key)
+
+    def _rebuild(self, items):
+        size = self.chunk_size
+        self.key_chunks = [[key for key, _ in items[i:i + size]] for i in range(0, len(items), size)]
+        self.value_chunks = [[value for _, value in items[i:i + size]] for i in range(0, len(items), size)]
+        self.maxes = [keys[-1] for keys in self.key_chunks]
+        self.length = len(items)
+
+    def range(self, lo=None, hi=None, reverse=False):
+        if reverse:
+            if hi is None:
+                c = len(self.maxes) - 1
+                i = len(self.key_chunks[c]) - 1 if c >= 0 else -1
+            else:
+                c = min(bisect_left(self.maxes, hi), len(self.maxes) - 1)
+                i = bisect_right(self.key_chunks[c], hi) - 1 if c >= 0 else -1
+            while c >= 0:
+                keys = self.key_chunks[c]
+                values = self.value_chunks[c]
+                while i >= 0:
+                    if lo is not None and keys[i] < lo:
+                        return
+                    yield keys[i], values[i]
+                    i -= 1
+                c -= 1
+                if c >= 0:
+                    i = len(self.key_chunks[c]) - 1
+        else:
+            c, i = self._locate(lo) if lo is not None else (0, 0)
+            while c < len(self.maxes):
+                keys = self.key_chunks[c]
+                values = self.value_chunks[c]
+                while i < len(keys):
+                    if hi is not None and keys[i] > hi:
+                        return
+                    yield keys[i], values[i]
+                    i += 1
+                c += 1
+                i = 0
+
+    def rank(self, key):
+        c, i = self._locate(key)
+        return sum(len(keys) for keys in self.key_chunks[:c]) + i
+
+    def _count_not_greater(self, key):
+        c = bisect_right(self.maxes, key)
+        count = sum(len(keys) for keys in self.key_chunks[:c])
+        if c < len(self.maxes):
+            count += bisect_right(self.key_chunks[c], key)
+        return count
+
+    def count_range(self, lo, hi):
+        if lo is not None and hi is not None and lo > hi:
+            return 0
+        upper = self.length if hi is None else self._count_not_greater(hi)
+        lower = 0 if lo is None else self.rank(lo)
+        return upper - lower
+
+    def select(self, index):
+        if index < 0 or index >= self.length:
+            raise IndexError("Index out of range.")
+        for keys, values in zip(self.key_chunks, self.value_chunks):
+            if index < len(keys):
+                return keys[index], values[index]
+            index -= len(keys)
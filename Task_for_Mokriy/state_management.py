@@ -1,59 +1,393 @@
+import contextlib
+import copy
+import os
 import pickle
+import threading
+from datetime import datetime
+
+from data_storage import DataPool, DataCollection
+from lazy_snapshot import (SegmentedSnapshot, LazyCollection, FrozenCollection, write_segmented, is_segmented,
+                           SNAPSHOT_WORKERS)
+
+MANIFEST = "MANIFEST"
+MERGE_DELTAS = 16  # Столько файлов дельт - и снимок сливается в новую базу
 
 
 class StateManager:
     def __init__(self, data_storage_system):
         self.data_storage_system = data_storage_system
+        self.bgsave_pid = None
+        self.bgsave_status = "idle"  # idle, in_progress, ok, failed
+        self.bgsave_started = None
+        self.last_save = None
+        self.last_save_file = None
+        self.last_save_seconds = None
+        self.lazy_snapshot = None  # Снимок, из которого ещё декодируются коллекции
 
     def save_state(self, filename):
-        state_to_save = {
-            'pools': self.data_storage_system.pools,
+        # Сегменты журнала до отметки покрыты снимком и после сохранения удаляются
+        wal = self.data_storage_system.wal
+        mark = wal.mark() if wal is not None else None
+        started = datetime.now()
+        self.write_snapshot(filename)
+        self._saved(filename, mark, started)
+
+    def write_snapshot(self, filename, pools=None, workers=SNAPSHOT_WORKERS):
+        if pools is None:
+            pools = self.snapshot_pools()
+        # Пишем во временный файл, чтобы оборванное сохранение не испортило прежний снимок
+        write_segmented(filename + '.tmp', pools, self.data_storage_system.secondary_indexes, workers,
+                        self._hold_for_fork)
+        os.replace(filename + '.tmp', filename)
+
+    def _saved(self, filename, mark, started):
+        wal = self.data_storage_system.wal
+        if wal is not None:
+            wal.set_snapshot(filename)
+            wal.drop_before(mark)
+        self.last_save = datetime.now()
+        self.last_save_file = filename
+        self.last_save_seconds = (self.last_save - started).total_seconds()
+
+    def bgsave(self, filename):
+        # Дочерний процесс после fork видит память родителя на момент fork
+        # (copy-on-write) и пишет снимок, пока родитель продолжает работать
+        if self.bgsave_status == "in_progress":
+            raise RuntimeError("Background save already in progress.")
+        dss = self.data_storage_system
+        with dss.lock:
+            wal = dss.wal
+            mark = wal.mark() if wal is not None else None
+            self.bgsave_status = "in_progress"
+            self.bgsave_started = started = datetime.now()
+            if hasattr(os, "fork"):
+                # Срез собирается до fork: файлы страниц общие с родителем,
+                # поэтому их копия снимается здесь, а не в потомке
+                pools = self.snapshot_pools()
+                with self._hold_for_fork():
+                    pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        # Без пула процессов: fork из потомка многопоточного процесса небезопасен
+                        self.write_snapshot(filename, pools, workers=1)
+                        code = 0
+                    finally:
+                        os._exit(code)
+                self.bgsave_pid = pid
+                del pools
+                worker = threading.Thread(target=self._wait_child, args=(pid, filename, mark, started))
+            else:
+                # Без fork коллекции сериализуются сразу, под блокировкой транзакций,
+                # а фоновый поток только сжимает и пишет готовые байты
+                pools = self.snapshot_pools(serialize=True)
+                worker = threading.Thread(target=self._write_in_thread, args=(pools, filename, mark, started))
+        worker.daemon = True
+        worker.start()
+
+    @contextlib.contextmanager
+    def _hold_for_fork(self):
+        # Блокировки, которые потомок может унаследовать захваченными другим
+        # потоком (прогрев ленивого снимка, журнал), берём на время fork
+        lazy = self.lazy_snapshot
+        locks = lazy.pending_locks() + [lazy.lock] if lazy is not None else []
+        wal = self.data_storage_system.wal
+        for lock in locks:
+            lock.acquire()
+        if wal is not None:
+            wal.pause()
+        try:
+            yield
+        finally:
+            if wal is not None:
+                wal.resume()
+            for lock in locks:
+                lock.release()
+
+    def _wait_child(self, pid, filename, mark, started):
+        _, status = os.waitpid(pid, 0)
+        self.bgsave_pid = None
+        if status == 0:
+            self._saved(filename, mark, started)
+            self.bgsave_status = "ok"
+        else:
+            self.bgsave_status = "failed"
+
+    def _write_in_thread(self, pools, filename, mark, started):
+        try:
+            self.write_snapshot(filename, pools)
+        except Exception:
+            self.bgsave_status = "failed"
+            return
+        self._saved(filename, mark, started)
+        self.bgsave_status = "ok"
+
+    def save_info(self):
+        return {
+            'bgsave_status': self.bgsave_status,
+            'bgsave_in_progress_seconds': (datetime.now() - self.bgsave_started).total_seconds()
+            if self.bgsave_status == "in_progress" else None,
+            'last_save': self.last_save.isoformat() if self.last_save is not None else None,
+            'last_save_file': self.last_save_file,
+            'last_save_seconds': self.last_save_seconds,
+        }
+
+    def save_incremental(self, directory, merge=False):
+        # Снимок-каталог: базовый файл, файлы дельт грязных коллекций и MANIFEST,
+        # который говорит, где лежит последняя версия каждой коллекции.
+        # Запись MANIFEST атомарна и служит точкой фиксации сохранения
+        wal = self.data_storage_system.wal
+        mark = wal.mark() if wal is not None else None
+        started = datetime.now()
+        os.makedirs(directory, exist_ok=True)
+        manifest = self.read_manifest(directory)
+        if manifest is None or merge or self._needs_merge(directory, manifest):
+            manifest = self._write_base(directory, manifest)
+        else:
+            manifest = self._write_deltas(directory, manifest)
+        self._write_manifest(directory, manifest)
+        # Файлы, на которые новый MANIFEST не ссылается, больше не нужны
+        live = set(manifest['locations'].values()) | {manifest['base'], MANIFEST}
+        for name in os.listdir(directory):
+            if name not in live:
+                os.remove(os.path.join(directory, name))
+        self._saved(directory, mark, started)
+
+    def _collections(self):
+        for pool_name, pool in self.data_storage_system.pools.items():
+            for schema_name, schema in pool.schemas.items():
+                for collection_name, collection in schema.collections.items():
+                    yield (pool_name, schema_name, collection_name), collection
+
+    def _structure(self):
+        return {
+            pool_name: {schema_name: list(schema.collections) for schema_name, schema in pool.schemas.items()}
+            for pool_name, pool in self.data_storage_system.pools.items()
+        }
+
+    def _needs_merge(self, directory, manifest):
+        deltas = set(manifest['locations'].values()) - {manifest['base']}
+        if len(deltas) >= MERGE_DELTAS:
+            return True
+        # Дельты весят больше базы: переписать всё дешевле, чем читать их при загрузке
+        delta_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in deltas)
+        return delta_bytes > os.path.getsize(os.path.join(directory, manifest['base']))
+
+    def _write_base(self, directory, manifest):
+        generation = manifest['generation'] + 1 if manifest is not None else 1
+        base = f"base-{generation:06d}.pickle"
+        for _, collection in self._collections():
+            collection.dirty = False
+        pools = self.snapshot_pools()
+        with open(os.path.join(directory, base), 'wb') as f:
+            pickle.dump({'pools': pools}, f)
+        return {
+            'generation': generation,
+            'base': base,
+            'structure': self._structure(),
+            'locations': {target: base for target, _ in self._collections()},
             'secondary_indexes': self.data_storage_system.secondary_indexes,
-            'schemas': self.serialize_schemas(),
-            'collections': self.serialize_collections()
         }
-        with open(filename, 'wb') as f:
-            pickle.dump(state_to_save, f)
+
+    def _write_deltas(self, directory, manifest):
+        generation = manifest['generation'] + 1
+        locations = {}
+        written = 0
+        for target, collection in self._collections():
+            location = manifest['locations'].get(target)
+            if collection.dirty or location is None:
+                location = f"delta-{generation:06d}-{written:04d}.pickle"
+                written += 1
+                collection.dirty = False
+                with open(os.path.join(directory, location), 'wb') as f:
+                    pickle.dump(self.freeze(collection), f)
+            locations[target] = location
+        return {
+            'generation': generation,
+            'base': manifest['base'],
+            'structure': self._structure(),
+            'locations': locations,
+            'secondary_indexes': self.data_storage_system.secondary_indexes,
+        }
+
+    def read_manifest(self, directory):
+        path = os.path.join(directory, MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _write_manifest(self, directory, manifest):
+        path = os.path.join(directory, MANIFEST)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _restore_incremental(self, directory):
+        manifest = self.read_manifest(directory)
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot manifest in '{directory}'.")
+        with open(os.path.join(directory, manifest['base']), 'rb') as f:
+            base_pools = pickle.load(f)['pools']
+        pools = {}
+        for pool_name, schemas in manifest['structure'].items():
+            pool = pools[pool_name] = DataPool()
+            for schema_name, collections in schemas.items():
+                pool.add_schema(schema_name)
+                schema = pool.get_schema(schema_name)
+                for collection_name in collections:
+                    location = manifest['locations'][(pool_name, schema_name, collection_name)]
+                    if location == manifest['base']:
+                        collection = base_pools[pool_name].schemas[schema_name].collections[collection_name]
+                    else:
+                        with open(os.path.join(directory, location), 'rb') as f:
+                            collection = pickle.load(f)
+                    collection.dirty = False
+                    # Снимки старых версий могли связать историю с другим объектом
+                    collection.persistence_manager.collection = collection
+                    schema.collections[collection_name] = collection
+        self.data_storage_system.pools = pools
+        self.data_storage_system.secondary_indexes = manifest['secondary_indexes']
 
     def load_state(self, filename):
+        self._restore(filename)
+        wal = self.data_storage_system.wal
+        if wal is not None:
+            # Загруженный файл становится новой базой, старый журнал к нему не относится
+            mark = wal.mark()
+            wal.set_snapshot(filename)
+            wal.drop_before(mark)
+            self.data_storage_system.attach_wal()
+
+    def recover(self):
+        # Запуск: последний снимок плюс всё, что успело попасть в журнал после него
+        snapshot = self.data_storage_system.wal.get_snapshot()
+        if snapshot is not None and os.path.exists(snapshot):
+            self._restore(snapshot)
+        self.data_storage_system.replay_wal()
+
+    def _restore(self, filename):
+        if os.path.isdir(filename):
+            self._restore_incremental(filename)
+            return
+        if is_segmented(filename):
+            self._restore_segmented(filename)
+            return
         with open(filename, 'rb') as f:
             saved_state = pickle.load(f)
-            self.data_storage_system.pools = saved_state.get('pools', {})
+            self.data_storage_system.pools = {
+                pool_name: self.upgrade_pool(pool) for pool_name, pool in saved_state.get('pools', {}).items()
+            }
             self.data_storage_system.secondary_indexes = saved_state.get('secondary_indexes', {})
             self.deserialize_schemas(saved_state.get('schemas', {}))
             self.deserialize_collections(saved_state.get('collections', {}))
 
-    def serialize_schemas(self):
-        serialized_schemas = {}
+    def _restore_segmented(self, filename):
+        # Читается только оглавление; коллекции остаются заглушками до первого
+        # обращения, остальные в фоне декодирует поток прогрева
+        snapshot = SegmentedSnapshot(filename)
+        pools = {}
+        for pool_name, schemas in snapshot.structure.items():
+            pool = pools[pool_name] = DataPool()
+            for schema_name, collections in schemas.items():
+                pool.add_schema(schema_name)
+                schema = pool.get_schema(schema_name)
+                for collection_name in collections:
+                    schema.collections[collection_name] = snapshot.placeholder(
+                        (pool_name, schema_name, collection_name))
+        self.data_storage_system.pools = pools
+        self.data_storage_system.secondary_indexes = snapshot.secondary_indexes
+        self.lazy_snapshot = snapshot
+        threading.Thread(target=snapshot.warm_up, daemon=True).start()
+
+    def upgrade_pool(self, pool):
+        # Старые снимки хранили пулы и схемы словарями с голыми контейнерами
+        if isinstance(pool, DataPool):
+            return pool
+        upgraded = DataPool()
+        for schema_name, collections in pool.items():
+            upgraded.add_schema(schema_name)
+            schema = upgraded.get_schema(schema_name)
+            for collection_name, container in collections.items():
+                schema.add_collection(collection_name)
+                if not isinstance(container, dict):
+                    schema.get_collection(collection_name).data = container
+        return upgraded
+
+    def snapshot_pools(self, serialize=False):
+        # Копируются только пулы, схемы и обёртки коллекций; контейнеры с snapshot()
+        # отдают неизменяемую версию (AVL за O(1), файл страниц - копией), и
+        # сохраняется именно она. serialize=True сразу превращает коллекции в байты
+        pools = {}
         for pool_name, pool in self.data_storage_system.pools.items():
+            pools[pool_name] = copy.copy(pool)
+            pools[pool_name].schemas = {}
+            for schema_name, schema in pool.schemas.items():
+                frozen_schema = copy.copy(schema)
+                frozen_schema.collections = {}
+                for collection_name, collection in schema.collections.items():
+                    frozen = self.freeze(collection)
+                    if serialize:
+                        frozen = FrozenCollection(frozen)
+                    frozen_schema.collections[collection_name] = frozen
+                pools[pool_name].schemas[schema_name] = frozen_schema
+        return pools
+
+    def freeze(self, collection):
+        # Не декодированная коллекция неизменна, её сегмент перепишется как есть
+        if type(collection) is LazyCollection:
+            return collection
+        frozen = copy.copy(collection)
+        if hasattr(collection.data, "snapshot"):
+            frozen.data = collection.data.snapshot()
+        # История должна ссылаться на копию, иначе в файл попадёт и живая
+        # коллекция, а после загрузки откат пойдёт по ней
+        frozen.persistence_manager = copy.copy(collection.persistence_manager)
+        frozen.persistence_manager.collection = frozen
+        return frozen
+
+    def serialize_schemas(self, pools=None):
+        if pools is None:
+            pools = self.data_storage_system.pools
+        serialized_schemas = {}
+        for pool_name, pool in pools.items():
             serialized_schemas[pool_name] = {}
-            for schema_name, schema in pool.items():
-                serialized_schemas[pool_name][schema_name] = list(schema.keys())
+            for schema_name, schema in pool.schemas.items():
+                serialized_schemas[pool_name][schema_name] = list(schema.collections.keys())
         return serialized_schemas
 
     def deserialize_schemas(self, serialized_schemas):
+        # Пулы восстановлены целиком; досоздаём только то, чего в них не оказалось
         for pool_name, schemas in serialized_schemas.items():
-            if pool_name in self.data_storage_system.pools:
+            pool = self.data_storage_system.get_pool(pool_name)
+            if pool is not None:
                 for schema_name, collections in schemas.items():
-                    self.data_storage_system.pools[pool_name][schema_name] = {}
+                    if pool.get_schema(schema_name) is None:
+                        pool.add_schema(schema_name)
+                    schema = pool.get_schema(schema_name)
                     for collection_name in collections:
-                        self.data_storage_system.pools[pool_name][schema_name][collection_name] = {}
+                        if schema.get_collection(collection_name) is None:
+                            schema.add_collection(collection_name)
 
-    def serialize_collections(self):
+    def serialize_collections(self, pools=None):
+        if pools is None:
+            pools = self.data_storage_system.pools
         serialized_collections = {}
-        for pool_name, pool in self.data_storage_system.pools.items():
+        for pool_name, pool in pools.items():
             serialized_collections[pool_name] = {}
-            for schema_name, schema in pool.items():
+            for schema_name, schema in pool.schemas.items():
                 serialized_collections[pool_name][schema_name] = {}
-                for collection_name, collection in schema.items():
-                    serialized_collections[pool_name][schema_name][collection_name] = list(collection.keys())
+                for collection_name, collection in schema.collections.items():
+                    serialized_collections[pool_name][schema_name][collection_name] = list(collection.data.keys())
         return serialized_collections
 
     def deserialize_collections(self, serialized_collections):
         for pool_name, schemas in serialized_collections.items():
-            if pool_name in self.data_storage_system.pools:
-                for schema_name, collections in schemas.items():
-                    if schema_name in self.data_storage_system.pools[pool_name]:
-                        self.data_storage_system.pools[pool_name][schema_name] = {}
-                        for collection_name in collections:
-                            self.data_storage_system.pools[pool_name][schema_name][collection_name] = {}
+            for schema_name, collections in schemas.items():
+                schema = self.data_storage_system.get_schema(pool_name, schema_name)
+                if schema is not None:
+                    for collection_name in collections:
+                        if schema.get_collection(collection_name) is None:
+                            schema.add_collection(collection_name)
@@ -0,0 +1,80 @@
+import os
+import random
+import tempfile
+import unittest
+
+from data_storage import DataStorageSystem
+from paged_btree import HEADER, PagedBTree, PageFile
+
+
+class PagedBTreeSplitTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "tree.db")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_mixed_value_sizes_with_eviction(self):
+        # Крупные и мелкие значения вперемешку, пул на минимум страниц,
+        # чтобы узлы постоянно вытеснялись на диск
+        rng = random.Random(7)
+        tree = PagedBTree(self.path, buffer_bytes=0)
+        expected = {}
+        for key in rng.sample(range(20000), 3000):
+            value = "x" * rng.choice((5, 10, 900, 1000))
+            tree.add(key, value)
+            expected[key] = value
+        for key in rng.sample(sorted(expected), 500):
+            value = "y" * rng.choice((1, 950))
+            tree.update(key, value)
+            expected[key] = value
+        tree.close()
+
+        tree = PagedBTree(self.path, buffer_bytes=0)
+        for key, value in expected.items():
+            self.assertEqual(tree.get(key), value)
+        self.assertEqual(list(tree.range()), sorted(expected.items()))
+        tree.close()
+
+    def test_write_rejects_oversized_node(self):
+        page_file = PageFile(self.path, 512)
+        with self.assertRaises(ValueError):
+            page_file.write(1, b"x" * (512 - HEADER.size + 1))
+        page_file.close()
+
+
+class PagedCollectionLifecycleTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def test_recreated_collection_starts_empty(self):
+        # Путь файла страниц выводится из имён, поэтому удалённая коллекция
+        # не должна оставлять файл, который подхватит новая с тем же именем
+        dss = DataStorageSystem()
+        dss.add_pool("p")
+        dss.add_schema("p", "s")
+        for remove in (lambda: dss.remove_collection("p", "s", "c"),
+                       lambda: dss.remove_schema("p", "s"),
+                       lambda: dss.remove_pool("p")):
+            if dss.get_pool("p") is None:
+                dss.add_pool("p")
+            if dss.get_schema("p", "s") is None:
+                dss.add_schema("p", "s")
+            dss.add_collection("p", "s", "c", "PAGED_BTREE")
+            collection = dss.get_collection("p", "s", "c")
+            self.assertIsNone(collection.get("a"))
+            collection.add("a", "1")
+            path = collection.data.path
+            remove()
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
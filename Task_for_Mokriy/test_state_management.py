@@ -0,0 +1,52 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+
+from data_storage import DataStorageSystem
+from state_management import StateManager
+
+
+class IncrementalSnapshotRollbackTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.dir.cleanup()
+
+    def test_rollback_after_restore(self):
+        # Контейнеры с snapshot() сохраняются копией коллекции; история
+        # после загрузки должна откатывать именно загруженную коллекцию
+        dss = DataStorageSystem()
+        dss.add_pool("p")
+        dss.add_schema("p", "s")
+        names = {"PERSISTENT_AVL": "avl", "PAGED_BTREE": "pg", "default": "plain"}
+        for container_type, name in names.items():
+            dss.add_collection("p", "s", name, container_type)
+            dss.get_collection("p", "s", name).add("a", "1")
+        manager = StateManager(dss)
+        manager.save_incremental("snap")
+        for name in names.values():
+            dss.get_collection("p", "s", name).add("b", "2")
+        manager.save_incremental("snap")  # Вторая запись - дельты
+        time.sleep(0.01)
+        checkpoint = datetime.now()
+        time.sleep(0.01)
+
+        restored = DataStorageSystem()
+        StateManager(restored).load_state("snap")
+        for name in names.values():
+            collection = restored.get_collection("p", "s", name)
+            self.assertIs(collection.persistence_manager.collection, collection)
+            collection.add("k", "3")
+            self.assertEqual(collection.rollback_to(checkpoint), 1)
+            self.assertIsNone(collection.get("k"))
+            self.assertEqual((collection.get("a"), collection.get("b")), ("1", "2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
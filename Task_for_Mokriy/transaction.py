@@ -0,0 +1,26 @@
+from wal import OP_ADD, OP_UPDATE, OP_DELETE
+
+
+# transaction.py
+# Транзакция только копит операции; проверка и применение идут целиком
+# в DataStorageSystem.commit под одной блокировкой.
+
+class Transaction:
+    def __init__(self, transaction_id):
+        self.id = transaction_id
+        self.operations = []  # (op, (пул, схема, коллекция), ключ, значение)
+
+    def add(self, pool_name, schema_name, collection_name, key, value):
+        self.operations.append((OP_ADD, (pool_name, schema_name, collection_name), key, value))
+
+    def update(self, pool_name, schema_name, collection_name, key, value):
+        self.operations.append((OP_UPDATE, (pool_name, schema_name, collection_name), key, value))
+
+    def delete(self, pool_name, schema_name, collection_name, key):
+        self.operations.append((OP_DELETE, (pool_name, schema_name, collection_name), key, None))
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __repr__(self):
+        return f"Transaction(id={self.id}, operations={len(self.operations)})"
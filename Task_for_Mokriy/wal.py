@@ -0,0 +1,194 @@
+import marshal
+import os
+import struct
+import threading
+import time
+import zlib
+
+
+# wal.py
+# Журнал упреждающей записи: каждая изменяющая операция дописывается в конец
+# текущего сегмента, сегменты ротируются по размеру. Записи копятся в буфере,
+# и один fsync фиксирует сразу всю накопившуюся группу (group commit).
+
+WAL_DIR = "wal"
+SEGMENT_BYTES = 64 * 1024 * 1024
+FLUSH_INTERVAL_MS = 10
+NEVER_BATCH = 1024  # При durability="never" буфер сбрасывается в ОС пачками
+
+RECORD = struct.Struct("<II")  # длина, crc32 тела записи
+SNAPSHOT_POINTER = "SNAPSHOT"
+
+OP_ADD = 1
+OP_UPDATE = 2
+OP_DELETE = 3
+OP_BATCH = 4  # Транзакция: value - список вложенных (op, target, key, value)
+OP_ADD_POOL = 10
+OP_REMOVE_POOL = 11
+OP_ADD_SCHEMA = 12
+OP_REMOVE_SCHEMA = 13
+OP_ADD_COLLECTION = 14  # value - (тип контейнера, параметры)
+OP_REMOVE_COLLECTION = 15
+OP_CREATE_INDEX = 16  # key - имя индекса, value - (вид, параметры)
+OP_BLOOM_FILTER = 17  # key - имя индекса или None, value - (ожидаемые ключи, fp) или None
+
+DURABILITY_MODES = ("always", "interval", "never")
+
+
+def encode_record(op, target, key=None, value=None):
+    payload = marshal.dumps((op, target, key, value))
+    return RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + RECORD.size <= len(data):
+        length, checksum = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        payload = data[start:start + length]
+        # Оборванная или повреждённая запись в хвосте: дальше сегмент не читаем
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield marshal.loads(payload)
+        offset = start + length
+
+
+class WriteAheadLog:
+    def __init__(self, directory=WAL_DIR, durability="interval",
+                 interval_ms=FLUSH_INTERVAL_MS, segment_bytes=SEGMENT_BYTES):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unsupported durability policy '{durability}'.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.durability = durability
+        self.interval = interval_ms / 1000
+        self.segment_bytes = segment_bytes
+
+        self.lock = threading.Lock()  # Буфер и счётчик записей
+        self.commit_lock = threading.Lock()  # Файл: пишет только лидер группы
+        self.buffer = []
+        self.seq = 0
+        self.durable_seq = 0
+
+        # Всегда начинаем новый сегмент, чтобы не дописывать за оборванной записью
+        segments = self.segments()
+        self.segment_id = segments[-1] + 1 if segments else 1
+        self.file = open(self._segment_path(self.segment_id), "ab")
+
+        self.closed = False
+        self.flusher = None
+        if durability == "interval":
+            self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self.flusher.start()
+
+    def _segment_path(self, segment_id):
+        return os.path.join(self.directory, f"wal-{segment_id:08d}.log")
+
+    def segments(self):
+        ids = []
+        for name in os.listdir(self.directory):
+            if name.startswith("wal-") and name.endswith(".log"):
+                ids.append(int(name[4:-4]))
+        return sorted(ids)
+
+    def append(self, op, target, key=None, value=None):
+        self.append_many([(op, target, key, value)])
+
+    def append_many(self, entries):
+        records = [encode_record(*entry) for entry in entries]
+        with self.lock:
+            self.buffer.extend(records)
+            self.seq += len(records)
+            seq = self.seq
+            pending = len(self.buffer)
+        if self.durability == "always":
+            self.commit(seq)
+        elif self.durability == "never" and pending >= NEVER_BATCH:
+            self.commit(seq, sync=False)
+
+    def commit(self, seq=None, sync=True):
+        # Пока лидер ждёт fsync, остальные писатели копят записи в буфере
+        # и ждут на commit_lock; следующий лидер заберёт их одним fsync,
+        # а тот, чью запись уже зафиксировали, сразу выходит
+        with self.commit_lock:
+            if seq is not None and self.durable_seq >= seq:
+                return
+            with self.lock:
+                pending, self.buffer = self.buffer, []
+                last = self.seq
+            if pending:
+                self.file.write(b"".join(pending))
+                self.file.flush()
+                if sync:
+                    os.fsync(self.file.fileno())
+                if self.file.tell() >= self.segment_bytes:
+                    self._rotate()
+            self.durable_seq = last
+
+    def _flush_loop(self):
+        while not self.closed:
+            time.sleep(self.interval)
+            if self.buffer:
+                self.commit()
+
+    def _rotate(self):
+        self.file.close()
+        self.segment_id += 1
+        self.file = open(self._segment_path(self.segment_id), "ab")
+
+    def mark(self):
+        # Граница для снимка: всё, что запишется после, попадёт в новый сегмент
+        with self.commit_lock:
+            with self.lock:
+                pending, self.buffer = self.buffer, []
+                last = self.seq
+            if pending:
+                self.file.write(b"".join(pending))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.durable_seq = last
+            self._rotate()
+            return self.segment_id
+
+    def pause(self):
+        # На время fork журнал держит свои блокировки сам: иначе потомок
+        # может унаследовать их захваченными потоком, которого у него нет
+        self.commit_lock.acquire()
+        self.lock.acquire()
+
+    def resume(self):
+        self.lock.release()
+        self.commit_lock.release()
+
+    def drop_before(self, segment_id):
+        for old in self.segments():
+            if old < segment_id:
+                os.remove(self._segment_path(old))
+
+    def replay(self):
+        for segment_id in self.segments():
+            yield from read_records(self._segment_path(segment_id))
+
+    def set_snapshot(self, filename):
+        pointer = os.path.join(self.directory, SNAPSHOT_POINTER)
+        with open(pointer + ".tmp", "w") as f:
+            f.write(os.path.abspath(filename))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer + ".tmp", pointer)
+
+    def get_snapshot(self):
+        pointer = os.path.join(self.directory, SNAPSHOT_POINTER)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return f.read().strip() or None
+
+    def close(self):
+        self.closed = True
+        if self.flusher is not None:
+            self.flusher.join()
+        self.commit()
+        self.file.close()